@@ -1,14 +1,31 @@
+import time
+
+# Taken before the heavy imports below, the first create_app() reports them as the "imports" phase
+_IMPORT_STARTED = time.perf_counter()
+
+import logging
 import os
 
-from flasgger import Swagger # type: ignore
 from flask import Flask
 from flask_migrate import Migrate
-from app.seed.seed_db import seed_status
+from app.seed.startup import prepare_database
+from app.repositories.product_repository import ProductRepository
+from app.repositories.status_repository import StatusRepository
+from app.repositories.user_repository import UserRepository
 
-from app.db import db
+from app.cli import init_cli
+from app.db import configure_database_profile, db, register_sqlite_pragmas
+from app.docs import init_docs
+from app.middlewares.compression import init_compression
+from app.middlewares.metrics import init_metrics, record_startup
+from app.middlewares.request_id import init_request_id
+from app.middlewares.sql_timing import init_sql_timing
+from app.middlewares.unit_of_work import init_unit_of_work
 
 
 def create_app():
+    global _IMPORT_STARTED
+    started = time.perf_counter()
     app = Flask(__name__)
     app.url_map.strict_slashes = False
 
@@ -17,44 +34,82 @@ def create_app():
     app.config['FLASK_DEBUG'] = os.getenv('FLASK_DEBUG') == 'True'
     app.config['FLASK_RUN_PORT'] = os.getenv('FLASK_RUN_PORT', '8080')
     app.config['FLASK_RUN_HOST'] = os.getenv('FLASK_RUN_HOST', '127.0.0.1')
+    app.config['DEFAULT_PAGE_SIZE'] = int(os.getenv('DEFAULT_PAGE_SIZE', '50'))
+    app.config['MAX_PAGE_SIZE'] = int(os.getenv('MAX_PAGE_SIZE', '500'))
+    app.config['STREAM_BATCH_SIZE'] = int(os.getenv('STREAM_BATCH_SIZE', '1000'))
+    app.config['BULK_CHUNK_SIZE'] = int(os.getenv('BULK_CHUNK_SIZE', '500'))
+    app.config['IMPORT_MAX_REPORTED_ERRORS'] = int(os.getenv('IMPORT_MAX_REPORTED_ERRORS', '100'))
+    app.config['ENTITY_CACHE_SIZE'] = int(os.getenv('ENTITY_CACHE_SIZE', '10000'))
+    app.config['ENTITY_CACHE_TTL'] = float(os.getenv('ENTITY_CACHE_TTL', '10'))
+    app.config['TABLE_VERSION_CACHE_TTL'] = float(os.getenv('TABLE_VERSION_CACHE_TTL', '1'))
+    app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', '100'))
+    app.config['QUERY_BUDGET_STRICT'] = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+    app.config['API_DOCS_ENABLED'] = os.getenv('API_DOCS_ENABLED', 'True') != 'False'
+    app.config['API_SPEC_FILE'] = os.getenv('API_SPEC_FILE')
+    app.config['STARTUP_LOCK_FILE'] = os.getenv('STARTUP_LOCK_FILE')
+    app.config['AUTOCOMPLETE_REFRESH_SECONDS'] = float(os.getenv('AUTOCOMPLETE_REFRESH_SECONDS', '60'))
+    app.config['STATUS_CACHE_REFRESH_SECONDS'] = float(os.getenv('STATUS_CACHE_REFRESH_SECONDS', '60'))
+    app.config['COMPRESSION_ENABLED'] = os.getenv('COMPRESSION_ENABLED', 'True') != 'False'
+    app.config['COMPRESSION_ENCODINGS'] = os.getenv('COMPRESSION_ENCODINGS', 'zstd,br,gzip')
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+    app.config['COMPRESSION_GZIP_LEVEL'] = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+    app.config['COMPRESSION_BROTLI_LEVEL'] = int(os.getenv('COMPRESSION_BROTLI_LEVEL', '4'))
+    app.config['COMPRESSION_ZSTD_LEVEL'] = int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3'))
 
+    configure_database_profile(app)
     db.init_app(app)
+    register_sqlite_pragmas(app)
+    init_request_id(app)
+    init_sql_timing(app)
+
+    for repository in (UserRepository, ProductRepository):
+        repository.cache.configure(app.config['ENTITY_CACHE_SIZE'], app.config['ENTITY_CACHE_TTL'])
+    StatusRepository.names.configure(app.config['STATUS_CACHE_REFRESH_SECONDS'])
     Migrate(app, db)
     
     from app.routes.default_routes import default_bp
     from app.routes.user_routes import user_bp
     from app.routes.product_routes import product_bp
     from app.routes.transactions_routes import transaction_bp
+    from app.routes.autocomplete_routes import autocomplete_bp
 
-    swagger_template = {
-        "swagger": "2.0",
-        "info": {
-            "title": "API de Testes para QAs",
-            "contact": {
-                "name": "Flavio Ramos",
-                "email": "flavior.desouza@gmail.com"},
-            "license": {
-                "name": "MIT License",
-                "url": "https://opensource.org/licenses/MIT"
-            },
-            "description": "API de Testes para QAs, com endpoints para usuários e produtos e documentação com Swagger, para treinamento de testes automatizados.",
-            "version": "1.0.0"
-        },
-        "host": f"localhost:{app.config['FLASK_RUN_PORT']}",
-        "basePath": "/",
-        "schemes": ["http"],
-        "paths": {},
-    }
-
-    Swagger(app, template=swagger_template)
+    init_docs(app)
 
     app.register_blueprint(default_bp)
     app.register_blueprint(user_bp)
     app.register_blueprint(product_bp, url_prefix="/products")
     app.register_blueprint(transaction_bp)
-    
+    app.register_blueprint(autocomplete_bp)
+
+    init_metrics(app)
+    init_compression(app)
+    init_unit_of_work(app)
+    init_cli(app)
+    setup_done = time.perf_counter()
+
     with app.app_context():
-        db.create_all()
-        seed_status() 
+        prepared = prepare_database(app)
+        StatusRepository.load_cache()
+        UserRepository.load_name_index()
+        ProductRepository.load_name_index()
+    ready = time.perf_counter()
+
+    # Only the first app created by the process includes the imports
+    process_started = _IMPORT_STARTED if _IMPORT_STARTED is not None else started
+    _IMPORT_STARTED = None
+    startup = {
+        "imports": started - process_started,
+        "setup": setup_done - started,
+        "database": ready - setup_done,
+        "total": ready - process_started,
+    }
+    app.extensions["startup"] = startup
+    record_startup(startup)
 
+    logging.info(
+        "App ready in %.0f ms (%s, database %s)",
+        startup["total"] * 1000,
+        ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in startup.items() if phase != "total"),
+        "created and seeded" if prepared else "already current",
+    )
     return app
@@ -0,0 +1,316 @@
+"""
+Optional ASGI entry point: ``python -m app.asgi``.
+
+The read endpoints of users, products and transactions run on the event loop with an async
+driver (aiosqlite), so an in-flight request holds a coroutine instead of an OS thread. Every
+other route is handed to the regular Flask app through a WSGI thread pool, so the API is the
+same in both modes. ``python -m app.serve`` keeps serving everything synchronously.
+
+The async routes skip the Flask hooks: no ETag, Server-Timing or per-route metrics. Their
+responses are compressed with the same settings as the Flask ones (app.middlewares.compression).
+
+Environment:
+    ASYNC_DATABASE_URI: async SQLAlchemy URL (default: SQLALCHEMY_DATABASE_URI with sqlite+aiosqlite)
+    ASYNC_DB_POOL_SIZE: connections kept by the async engine (default: 20)
+    WEB_CONCURRENCY: number of worker processes (default: 1)
+    WEB_THREADS: threads of the pool running the Flask routes (default: 10)
+    FLASK_RUN_HOST / FLASK_RUN_PORT: bind address (default: 0.0.0.0:8080)
+"""
+import logging
+import os
+import re
+from urllib.parse import parse_qsl
+
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+from app.db import apply_sqlite_pragmas
+from app.middlewares.compression import compress_body, compress_stream, enabled_encodings, negotiate, new_compressor
+from app.models.product import Product
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.repositories.async_read_repository import AsyncReadRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.user_repository import UserRepository
+from app.utils.fields import FieldsError, parse_fields
+from app.utils.pagination import PaginationError, parse_page_args, wants_all
+from app.utils.streaming import NDJSON_CHUNK_ROWS, NDJSON_MIMETYPE
+
+from main import app as flask_app
+
+_ENCODINGS = enabled_encodings(flask_app.config) if flask_app.config["COMPRESSION_ENABLED"] else []
+
+
+def async_database_uri(sync_uri : str):
+    uri = os.getenv("ASYNC_DATABASE_URI")
+    if uri:
+        return uri
+
+    url = make_url(sync_uri)
+    if url.get_backend_name() != "sqlite":
+        raise RuntimeError("Set ASYNC_DATABASE_URI to use the async mode with a database other than SQLite")
+    return str(url.set(drivername="sqlite+aiosqlite"))
+
+
+def _dumps(data):
+    return flask_app.json.dumps(data, separators=(",", ":")) + "\n"
+
+
+def _dumps_like_jsonify(data):
+    # jsonify() indents the output in debug mode unless the provider is set to compact
+    provider = flask_app.json
+    if provider.compact is False or (provider.compact is None and flask_app.debug):
+        return provider.dumps(data, indent=2) + "\n"
+    return _dumps(data)
+
+
+def _headers(content_type : str, encoding : str | None):
+    headers = [
+        (b"content-type", content_type.encode()),
+        # Same as CORS(app) on the Flask routes
+        (b"access-control-allow-origin", b"*"),
+    ]
+    if _ENCODINGS:
+        headers.append((b"vary", b"Accept-Encoding"))
+    if encoding is not None:
+        headers.append((b"content-encoding", encoding.encode()))
+    return headers
+
+
+class JsonResponse:
+    def __init__(self, data, status : int = 200):
+        self.body = _dumps_like_jsonify(data).encode()
+        self.status = status
+
+    async def __call__(self, send, encoding : str | None = None):
+        body = self.body
+        if encoding is not None and len(body) >= flask_app.config["COMPRESSION_MIN_SIZE"]:
+            compressed = compress_body(body, new_compressor(encoding, flask_app.config))
+            if len(compressed) < len(body):
+                body = compressed
+            else:
+                encoding = None
+        else:
+            encoding = None
+
+        headers = _headers("application/json", encoding)
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": self.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class NdjsonResponse:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __call__(self, send, encoding : str | None = None):
+        await send({"type": "http.response.start", "status": 200, "headers": _headers(NDJSON_MIMETYPE, encoding)})
+        compressor = new_compressor(encoding, flask_app.config) if encoding is not None else None
+
+        chunk = []
+        async for row in self.rows:
+            chunk.append(_dumps(row))
+            if len(chunk) >= NDJSON_CHUNK_ROWS:
+                body = "".join(chunk).encode()
+                if compressor is not None:
+                    body = compressor.compress(body) + compressor.flush()
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+                chunk = []
+
+        body = "".join(chunk).encode()
+        if compressor is not None:
+            body = b"".join(compress_stream([body], compressor))
+        await send({"type": "http.response.body", "body": body})
+
+
+class Request:
+    def __init__(self, scope, path_params : dict):
+        self.path_params = path_params
+        # Blank values kept and the first of repeated keys wins, as request.args.get() in Flask
+        self.args = {}
+        for key, value in parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True):
+            self.args.setdefault(key, value)
+        headers = dict(scope["headers"])
+        self.accept = headers.get(b"accept", b"").decode("latin-1")
+        self.encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"), _ENCODINGS) if _ENCODINGS else None
+
+    def wants_ndjson(self):
+        # Without quality values, the most common case; Flask's best_match is used by the sync routes
+        return NDJSON_MIMETYPE in self.accept and "application/json" not in self.accept
+
+
+class AsyncReadApi:
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.session_factory = None
+        self.engine = None
+        self.routes = []
+
+    def route(self, pattern : str):
+        regex = re.compile("^" + re.sub(r"<int:(\w+)>", r"(?P<\1>[0-9]+)", pattern) + "/?$")
+
+        def decorator(handler):
+            self.routes.append((regex, handler))
+            return handler
+
+        return decorator
+
+    async def startup(self):
+        config = flask_app.config
+        self.engine = create_async_engine(
+            async_database_uri(config["SQLALCHEMY_DATABASE_URI"]),
+            # aiosqlite defaults to NullPool, which opens a connection (and its thread) per request
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", "20")),
+            max_overflow=0,
+        )
+        if config.get("SQLITE_PRAGMAS"):
+            apply_sqlite_pragmas(self.engine.sync_engine, config["SQLITE_PRAGMAS"])
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        logging.info("Async read routes ready on %s", self.engine.url)
+
+    async def shutdown(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        if scope["type"] == "http" and scope["method"] == "GET":
+            for regex, handler in self.routes:
+                match = regex.match(scope["path"])
+                if match:
+                    params = {name: int(value) for name, value in match.groupdict().items()}
+                    return await self._dispatch(handler, Request(scope, params), send)
+
+        return await self.fallback(scope, receive, send)
+
+    async def _dispatch(self, handler, request : Request, send):
+        session = self.session_factory()
+        started = False
+
+        async def tracked_send(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            response = await handler(session, request)
+            await response(tracked_send, request.encoding)
+        except (PaginationError, FieldsError) as e:
+            await JsonResponse({"error": str(e)}, 400)(send)
+        except Exception as e:
+            logging.error("Error in async %s: %s", handler.__name__, str(e), exc_info=True)
+            if started:
+                # A streamed response already sent its status, only the body can still be ended
+                await send({"type": "http.response.body", "body": b""})
+            else:
+                await JsonResponse({"error": "Internal Server Error"}, 500)(send)
+        finally:
+            await session.close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+application = AsyncReadApi(WSGIMiddleware(flask_app, workers=int(os.getenv("WEB_THREADS", "10"))))
+
+
+async def _list(session, request : Request, model):
+    fields = parse_fields(model, request.args)
+    if request.wants_ndjson():
+        batch_size = flask_app.config["STREAM_BATCH_SIZE"]
+        return NdjsonResponse(AsyncReadRepository.iter_all(session, model, batch_size, fields))
+
+    if wants_all(request.args):
+        result = await AsyncReadRepository.get_all(session, model, fields)
+    else:
+        limit, after = parse_page_args(request.args, flask_app.config)
+        result = await AsyncReadRepository.get_page(session, model, limit, after, fields)
+
+    if result is None:
+        return JsonResponse({"error": "Internal Server Error"}, 500)
+    return JsonResponse(result)
+
+
+async def _one(session, request : Request, model, row_id : int, not_found : str, cache=None):
+    fields = parse_fields(model, request.args)
+    result = await AsyncReadRepository.get_by_id(session, model, row_id, cache, fields)
+    if result is None:
+        return JsonResponse({"error": not_found}, 404)
+    return JsonResponse(result)
+
+
+@application.route("/users")
+async def get_users(session, request):
+    return await _list(session, request, User)
+
+
+@application.route("/user/<int:user_id>")
+async def get_user_by_id(session, request):
+    return await _one(session, request, User, request.path_params["user_id"], "User not found", UserRepository.cache)
+
+
+@application.route("/products")
+async def get_products(session, request):
+    return await _list(session, request, Product)
+
+
+@application.route("/products/<int:product_id>")
+async def get_product_by_id(session, request):
+    return await _one(session, request, Product, request.path_params["product_id"], "Product not found", ProductRepository.cache)
+
+
+@application.route("/transactions")
+async def get_all_transactions(session, request):
+    return await _list(session, request, Transaction)
+
+
+@application.route("/transactions/<int:transaction_id>")
+async def get_transaction_by_id(session, request):
+    return await _one(session, request, Transaction, request.path_params["transaction_id"], "Transaction not found")
+
+
+@application.route("/transactions/user/<int:user_id>")
+async def get_transaction_by_user_id(session, request):
+    fields = parse_fields(Transaction, request.args)
+    transactions = await AsyncReadRepository.filter_by(session, Transaction, fields, user_id=request.path_params["user_id"])
+    if not transactions:
+        return JsonResponse({"error": "Transaction not found"}, 404)
+    return JsonResponse(transactions)
+
+
+def main():
+    import uvicorn
+
+    # Only for the command line: importing this module must not change the environment
+    load_dotenv()
+    uvicorn.run(
+        "app.asgi:application",
+        host=os.getenv("FLASK_RUN_HOST", "0.0.0.0"),
+        port=int(os.getenv("FLASK_RUN_PORT", "8080")),
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        access_log=bool(os.getenv("WEB_ACCESS_LOG")),
+        log_config=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
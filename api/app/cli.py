@@ -0,0 +1,289 @@
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stderr
+from datetime import datetime, timedelta
+
+import click
+
+from app import logging_config
+from app.db import db, unit_of_work
+from app.middlewares.compression import CODECS, compress_body
+from app.middlewares.sql_timing import collect_queries
+from app.models.product import Product
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.user_repository import UserRepository
+from app.repositories.user_summary_repository import UserSummaryRepository
+from app.utils.status_names import status_names
+
+# Levels measured by `flask compression benchmark`, for the installed encodings
+BENCHMARK_LEVELS = {"gzip": (1, 3, 6, 9), "br": (1, 4, 6, 9, 11), "zstd": (1, 3, 6, 12, 19)}
+
+# Run in a new interpreter by `flask benchmark startup`: imports the app and builds it once
+STARTUP_SCRIPT = (
+    "import time; started = time.perf_counter(); from app import create_app; create_app(); "
+    "print(time.perf_counter() - started)"
+)
+
+# Rows written per INSERT by `flask benchmark indexes`
+BENCHMARK_INSERT_BATCH = 50_000
+
+
+@contextmanager
+def _scratch_app(**env):
+    """
+    A new app on an empty SQLite file in a temporary directory, with ``env`` set while it is
+    created, so the benchmarks never write to the configured database.
+    """
+    from app import create_app
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'benchmark.db')}",
+               "API_DOCS_ENABLED": "False", **env}
+        saved = {name: os.environ.get(name) for name in env}
+        os.environ.update(env)
+        try:
+            scratch = create_app()
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+        try:
+            yield scratch
+        finally:
+            with scratch.app_context():
+                db.engine.dispose()
+
+
+def _use_logging(stream, level : str, queued : bool):
+    """Sends the root logger to ``stream``, through the queue listener or written synchronously as basicConfig does."""
+    logging_config._stop_listener()
+    if queued:
+        with redirect_stderr(stream):
+            logging_config.configure_logging()
+        logging.getLogger().setLevel(level)
+    else:
+        logging.basicConfig(level=level, stream=stream, force=True)
+
+
+def init_cli(app):
+    @app.cli.group("user-summary")
+    def user_summary_cli():
+        """Per-user transaction summary (user_summary table)."""
+
+    @user_summary_cli.command("rebuild")
+    def rebuild_user_summary():
+        """Recomputes user_summary from the transactions and reports the rows that were out of date."""
+        with unit_of_work():
+            written, mismatched = UserSummaryRepository.rebuild()
+
+        click.echo(f"user_summary rebuilt: {written} rows, {mismatched} differed from the incremental values")
+        if mismatched:
+            raise SystemExit(1)
+
+    @app.cli.group("compression")
+    def compression_cli():
+        """Response compression (app.middlewares.compression)."""
+
+    @compression_cli.command("benchmark")
+    @click.argument("path", default="/transactions")
+    @click.option("--repeat", default=5, show_default=True, help="Runs per level, the fastest one is reported.")
+    def benchmark_compression(path, repeat):
+        """Compresses the response of GET PATH with every installed encoding and level, printing size and CPU time."""
+        response = app.test_client().get(path, headers={"Accept-Encoding": "identity"})
+        body = response.get_data()
+        click.echo(f"GET {path}: {response.status_code}, {len(body)} bytes")
+        click.echo(f"{'encoding':<10}{'level':>6}{'bytes':>12}{'ratio':>8}{'ms':>10}{'MB/s':>9}")
+
+        for encoding, (compressor, _) in CODECS.items():
+            for level in BENCHMARK_LEVELS[encoding]:
+                elapsed = float("inf")
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    compressed = compress_body(body, compressor(level))
+                    elapsed = min(elapsed, time.perf_counter() - started)
+
+                click.echo(
+                    f"{encoding:<10}{level:>6}{len(compressed):>12}{len(body) / len(compressed):>8.1f}"
+                    f"{elapsed * 1000:>10.2f}{len(body) / elapsed / 1e6:>9.0f}"
+                )
+
+    @app.cli.group("benchmark")
+    def benchmark_cli():
+        """Benchmarks run on a temporary SQLite database."""
+
+    @benchmark_cli.command("status-cache")
+    @click.option("--requests", "count", default=2000, show_default=True, help="POST /transaction calls per mode.")
+    def benchmark_status_cache(count):
+        """
+        POST /transaction with the status maps loaded, and with them emptied before every request so
+        each one reads the status table again, printing statements per request and req/s.
+        """
+        with _scratch_app(STATUS_CACHE_REFRESH_SECONDS="0") as scratch:
+            client = scratch.test_client()
+            user = client.post("/user", json={"name": "Benchmark", "email": "benchmark@example.com", "document": "00000000000"})
+            product = client.post("/products", json={"name": "Benchmark", "price": 1.0, "stock": 2 * count, "description": "Benchmark"})
+            payload = {"user_id": user.get_json()["id"], "product_id": product.get_json()["id"], "quantity": 1,
+                       "status_id": "pending", "status": "pending"}
+
+            click.echo(f"{'mode':<10}{'statements/request':>20}{'req/s':>10}")
+            # Only the request path is measured, not the log writes
+            logging.disable(logging.WARNING)
+            try:
+                for mode, cold in (("cached", False), ("reloaded", True)):
+                    statements = 0
+                    started = time.perf_counter()
+                    for _ in range(count):
+                        if cold:
+                            status_names.load(())
+                        with collect_queries() as stats:
+                            response = client.post("/transaction", json=payload)
+                        if response.status_code != 201:
+                            raise click.ClickException(f"POST /transaction: {response.status_code} {response.get_data(as_text=True)}")
+                        statements += stats.count
+                    elapsed = time.perf_counter() - started
+                    click.echo(f"{mode:<10}{statements / count:>20.1f}{count / elapsed:>10.0f}")
+            finally:
+                logging.disable(logging.NOTSET)
+
+    @benchmark_cli.command("indexes")
+    @click.option("--rows", default=1_000_000, show_default=True, help="Users and transactions inserted.")
+    @click.option("--lookups", default=50, show_default=True, help="Random lookups per query and mode.")
+    def benchmark_indexes(rows, lookups):
+        """
+        Average latency of UserRepository.get_by_name and TransactionRepository.get_by_user_id with
+        the single-column lookup indexes of the models, then after dropping them.
+        """
+        with _scratch_app() as scratch, scratch.app_context():
+            click.echo(f"Inserting {rows} users and transactions...")
+            products = [{"name": f"Product {i}", "price": float(i % 100), "stock": 0} for i in range(1000)]
+            db.session.execute(Product.__table__.insert(), products)
+            status_id = status_names.id_by_name("pending")
+            now = datetime.utcnow()
+            # Every batch is over the slow query threshold
+            logging.disable(logging.WARNING)
+            try:
+                for start in range(0, rows, BENCHMARK_INSERT_BATCH):
+                    numbers = range(start + 1, min(start + BENCHMARK_INSERT_BATCH, rows) + 1)
+                    db.session.execute(User.__table__.insert(), [
+                        {"id": i, "name": f"User {i}", "email": f"user{i}@example.com", "document": str(i)} for i in numbers
+                    ])
+                    db.session.execute(Transaction.__table__.insert(), [
+                        {"user_id": i, "product_id": i % 1000 + 1, "quantity": 1, "total": 1.0, "status_id": status_id,
+                         "transaction_date": now - timedelta(seconds=i)} for i in numbers
+                    ])
+                db.session.commit()
+            finally:
+                logging.disable(logging.NOTSET)
+
+            indexes = [
+                index for table in (User.__table__, Product.__table__, Transaction.__table__)
+                for index in table.indexes if len(index.columns) == 1
+            ]
+            queries = {
+                "user by name": lambda i: UserRepository.get_by_name(f"User {i}"),
+                "transactions by user_id": lambda i: TransactionRepository.get_by_user_id(i),
+            }
+            sample = [random.randint(1, rows) for _ in range(lookups)]
+
+            results = {name: [] for name in queries}
+            for indexed in (True, False):
+                if not indexed:
+                    for index in indexes:
+                        index.drop(bind=db.engine)
+                for name, query in queries.items():
+                    started = time.perf_counter()
+                    for i in sample:
+                        query(i)
+                    results[name].append((time.perf_counter() - started) / lookups * 1000)
+                    db.session.rollback()
+
+            click.echo(f"{'query':<26}{'indexed ms':>12}{'no index ms':>13}")
+            for name, (indexed_ms, scan_ms) in results.items():
+                click.echo(f"{name:<26}{indexed_ms:>12.3f}{scan_ms:>13.3f}")
+
+    @benchmark_cli.command("logging")
+    @click.option("--requests", "count", default=2000, show_default=True, help="Requests per endpoint and mode.")
+    def benchmark_logging(count):
+        """
+        Requests/sec of POST /user and GET /products with the logs written synchronously at DEBUG
+        and through the queue listener at DEBUG and at INFO, to a temporary file.
+        """
+        modes = (("sync, DEBUG", "DEBUG", False), ("queue, DEBUG", "DEBUG", True), ("queue, INFO", "INFO", True))
+        with _scratch_app() as scratch, tempfile.TemporaryFile("w") as log_file:
+            client = scratch.test_client()
+            for i in range(50):
+                client.post("/products", json={"name": f"Product {i}", "price": 1.0, "stock": 1, "description": "Benchmark"})
+
+            results = []
+            try:
+                for mode, level, queued in modes:
+                    _use_logging(log_file, level, queued)
+                    rates = []
+                    for method, path, body in (("POST", "/user", True), ("GET", "/products", False)):
+                        started = time.perf_counter()
+                        for i in range(count):
+                            if body:
+                                response = client.post(path, json={"name": "Benchmark", "email": "benchmark@example.com", "document": f"{mode}-{i}"})
+                            else:
+                                response = client.get(path)
+                            if response.status_code >= 400:
+                                raise click.ClickException(f"{method} {path}: {response.status_code}")
+                        rates.append(count / (time.perf_counter() - started))
+                    results.append((mode, rates))
+            finally:
+                logging_config.configure_logging()
+
+        click.echo(f"{'mode':<16}{'POST /user req/s':>18}{'GET /products req/s':>21}")
+        for mode, (post_rate, get_rate) in results:
+            click.echo(f"{mode:<16}{post_rate:>18.0f}{get_rate:>21.0f}")
+
+    @benchmark_cli.command("startup")
+    @click.option("--runs", default=7, show_default=True, help="Fresh processes per mode, the median is reported.")
+    @click.option("--requests", "count", default=200, show_default=True, help="GET /apispec_1.json calls after the first one.")
+    def benchmark_startup(runs, count):
+        """
+        Import plus the first create_app() in a fresh process, with the docs enabled and with
+        API_DOCS_ENABLED=False, then the time to serve /apispec_1.json built and loaded from API_SPEC_FILE.
+        """
+        api_root = os.path.dirname(app.root_path)
+        click.echo(f"{'mode':<24}{'startup ms':>12}")
+        with tempfile.TemporaryDirectory() as directory:
+            for mode, docs_enabled in (("docs enabled", "True"), ("API_DOCS_ENABLED=False", "False")):
+                env = {**os.environ, "API_DOCS_ENABLED": docs_enabled,
+                       "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, f'{docs_enabled}.db')}"}
+                timings = []
+                for _ in range(runs):
+                    result = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=api_root, env=env,
+                                            capture_output=True, text=True, check=True)
+                    timings.append(float(result.stdout.strip().splitlines()[-1]))
+                click.echo(f"{mode:<24}{statistics.median(timings) * 1000:>12.0f}")
+
+            spec_file = os.path.join(directory, "apispec.json")
+            click.echo(f"{'/apispec_1.json':<24}{'first ms':>12}{'later ms':>12}")
+            for mode, env in (("built", {}), ("from API_SPEC_FILE", {"API_SPEC_FILE": spec_file})):
+                with _scratch_app(API_DOCS_ENABLED="True", **env) as scratch:
+                    client = scratch.test_client()
+                    started = time.perf_counter()
+                    body = client.get("/apispec_1.json").get_data()
+                    first = time.perf_counter() - started
+                    if not env:
+                        # The artifact `flask docs export` writes, for the next mode
+                        with open(spec_file, "wb") as f:
+                            f.write(body)
+
+                    started = time.perf_counter()
+                    for _ in range(count):
+                        client.get("/apispec_1.json")
+                    later = (time.perf_counter() - started) / count
+                click.echo(f"{mode:<24}{first * 1000:>12.1f}{later * 1000:>12.2f}")
@@ -0,0 +1,102 @@
+import logging
+
+from flask import request, jsonify
+from typing import Literal, Tuple
+from flask import Response
+from app.docs import swag_from
+
+from app.services.autocomplete_service import AutocompleteService
+from app.middlewares.sql_timing import query_budget
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+class AutocompleteController:
+    @staticmethod
+    @swag_from({
+        'tags': ['Autocomplete'],
+        'summary': 'Names starting with a prefix',
+        'description': 'Served from an in-memory index of this worker, accents and case are ignored.',
+        'parameters': [
+            {
+                'in': 'query',
+                'name': 'type',
+                'required': True,
+                'schema': {
+                    'type': 'string',
+                    'enum': ['user', 'product']
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'prefix',
+                'required': True,
+                'schema': {
+                    'type': 'string',
+                    'example': 'cad'
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'limit',
+                'required': False,
+                'schema': {
+                    'type': 'integer',
+                    'default': DEFAULT_LIMIT,
+                    'maximum': MAX_LIMIT
+                }
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Matching names in alphabetical order',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'id': {'type': 'integer'},
+                                    'name': {'type': 'string'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            400: {
+                'description': 'Invalid type, prefix or limit'
+            },
+            500: {
+                'description': 'Internal Server Error'
+            }
+        }
+    })
+    @query_budget(1)
+    def autocomplete() -> Tuple[Response, Literal[200, 400, 500]]:
+        try:
+            entity = request.args.get("type")
+            if entity not in AutocompleteService.REPOSITORIES:
+                return jsonify({"error": "Bad Request: 'type' deve ser 'user' ou 'product'"}), 400
+
+            prefix = request.args.get("prefix", "")
+            if not prefix.strip():
+                return jsonify({"error": "Bad Request: 'prefix' é obrigatório"}), 400
+
+            try:
+                limit = int(request.args.get("limit", DEFAULT_LIMIT))
+            except ValueError:
+                return jsonify({"error": "Bad Request: 'limit' deve ser um número inteiro"}), 400
+            if limit < 1:
+                return jsonify({"error": "Bad Request: 'limit' deve ser maior que zero"}), 400
+
+            names = AutocompleteService.autocomplete(entity, prefix, min(limit, MAX_LIMIT))
+            if names is None:
+                return jsonify({"error": "Internal Server Error"}), 500
+
+            return jsonify(names), 200
+        except Exception as e:
+            logging.error("Error in autocomplete: %s", str(e), exc_info=True)
+            return jsonify({"error": "Internal Server Error"}), 500
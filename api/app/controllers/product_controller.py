@@ -1,11 +1,20 @@
+import codecs
+import csv
 import logging
 
-from flasgger import swag_from
-from flask import request, jsonify
+from app.docs import swag_from
+from flask import current_app, request, jsonify
 from typing import Literal, Tuple
 from flask import Response
 
+from app.models.product import Product
 from app.services.product_service import ProductService
+from app.middlewares.sql_timing import query_budget
+from app.utils.etag import conditional_on
+from app.utils.fields import FieldsError, parse_fields
+from app.utils.pagination import PaginationError, parse_page_args, wants_all
+from app.utils.search import SearchError, parse_search_args
+from app.utils.streaming import NDJSON_MIMETYPE, iter_ndjson, ndjson_response, wants_ndjson
 
 
 class ProductController:
@@ -14,6 +23,46 @@ class ProductController:
         'tags': ['Product'],
         'summary': 'Get all products',
         'description': 'Get all products',
+        'parameters': [
+            {
+                'in': 'query',
+                'name': 'fields',
+                'description': 'Comma-separated keys to return, e.g. id,name,price; only those columns are read',
+                'required': False,
+                'schema': {
+                    'type': 'string'
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'limit',
+                'description': 'Page size (capped by MAX_PAGE_SIZE). Without all=1 the response is a page object.',
+                'required': False,
+                'schema': {
+                    'type': 'integer',
+                    'example': 50
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'after',
+                'description': 'Cursor returned as next_cursor by the previous page',
+                'required': False,
+                'schema': {
+                    'type': 'integer',
+                    'example': 50
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'all',
+                'description': 'all=1 returns the whole list instead of a page',
+                'required': False,
+                'schema': {
+                    'type': 'boolean'
+                }
+            }
+        ],
         'responses': {
             200: {
                 'description': 'List of products'
@@ -23,16 +72,31 @@ class ProductController:
             }
         }
     })
+    @conditional_on("product")
+    @query_budget(1)
     def get_products():
         try:
-            products = ProductService.get_all_products()
-            if isinstance(products, dict) and "error" in products:
-                return jsonify(products), 500
+            fields = parse_fields(Product)
+            if wants_ndjson():
+                return ndjson_response(ProductService.stream_products(fields))
+
+            if wants_all():
+                products = ProductService.get_all_products(fields)
+                if isinstance(products, dict) and "error" in products:
+                    return jsonify(products), 500
+
+                return jsonify(products), 200
 
-            logging.info(f"Fetched {len(products)} products")
-            return jsonify(products), 200
+            limit, after = parse_page_args()
+            page = ProductService.get_products_page(limit, after, fields)
+            if not isinstance(page, dict) or "error" in page:
+                return jsonify({"error": "Internal Server Error"}), 500
+
+            return jsonify(page), 200
+        except (PaginationError, FieldsError) as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logging.error(f"Error in get_products: {str(e)}", exc_info=True)
+            logging.error("Error in get_products: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -87,7 +151,7 @@ class ProductController:
     def create_product():
         try:
             data = request.json
-            logging.debug(f"Request Data: {data}")
+            logging.debug("Request Data: %s", data)
 
             if not data:
                 return jsonify({"error": "Invalid request, no JSON received"}), 400
@@ -99,7 +163,84 @@ class ProductController:
 
             return jsonify(product), 201
         except Exception as e:
-            logging.error(f"Error in create_product: {str(e)}", exc_info=True)
+            logging.error("Error in create_product: %s", str(e), exc_info=True)
+            return jsonify({"error": "Internal Server Error"}), 500
+
+    @staticmethod
+    @swag_from({
+        'tags': ['Product'],
+        'summary': 'Import products',
+        'description': 'Bulk import of products from a CSV (text/csv, header name,price,stock,description) or NDJSON (application/x-ndjson) upload. The body is parsed incrementally and written in chunks.',
+        'consumes': ['text/csv', 'application/x-ndjson'],
+        'parameters': [
+            {
+                'in': 'query',
+                'name': 'upsert',
+                'description': 'Update the products that already exist with the same name instead of inserting them',
+                'required': False,
+                'schema': {
+                    'type': 'boolean',
+                    'example': False
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'chunk_size',
+                'description': 'Rows written per DB transaction (default BULK_CHUNK_SIZE)',
+                'required': False,
+                'schema': {
+                    'type': 'integer',
+                    'example': 500
+                }
+            },
+            {
+                'in': 'body',
+                'name': 'body',
+                'description': 'CSV or NDJSON content',
+                'required': True,
+                'schema': {
+                    'type': 'string'
+                }
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Import report with counters and the first row errors'
+            },
+            400: {
+                'description': 'Invalid request'
+            },
+            415: {
+                'description': 'Unsupported content type'
+            },
+            500: {
+                'description': 'Internal Server Error'
+            }
+        }
+    })
+    def import_products():
+        try:
+            if request.mimetype == "text/csv":
+                reader = csv.DictReader(codecs.iterdecode(request.stream, "utf-8-sig"))
+                rows = ((reader.line_num, row) for row in reader)
+            elif request.mimetype == NDJSON_MIMETYPE:
+                rows = iter_ndjson(request.stream, strict=False)
+            else:
+                return jsonify({"error": "Unsupported content type, use text/csv or application/x-ndjson"}), 415
+
+            chunk_size = request.args.get("chunk_size", current_app.config["BULK_CHUNK_SIZE"], type=int)
+            if chunk_size < 1:
+                return jsonify({"error": "Invalid request, 'chunk_size' must be greater than zero"}), 400
+
+            upsert = request.args.get("upsert", "false").lower() in ("1", "true", "yes")
+
+            report = ProductService.import_products(rows, chunk_size, upsert)
+            return jsonify(report), 200
+        except (csv.Error, UnicodeDecodeError) as e:
+            logging.warning("Invalid import file: %s", str(e))
+            return jsonify({"error": f"Invalid file: {str(e)}"}), 400
+        except Exception as e:
+            logging.error("Error in import_products: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -108,6 +249,15 @@ class ProductController:
         'summary': 'Get product by ID',
         'description': 'Get product by ID',
         'parameters': [
+            {
+                'in': 'query',
+                'name': 'fields',
+                'description': 'Comma-separated keys to return, e.g. id,name,price; only those columns are read',
+                'required': False,
+                'schema': {
+                    'type': 'string'
+                }
+            },
             {
                 'in': 'path',
                 'name': 'product_id',
@@ -131,15 +281,80 @@ class ProductController:
             }
         }
     })
-    def get_product_by_id(product_id : int) -> Tuple[Response, Literal[200, 404, 500]]:
+    @conditional_on("product")
+    @query_budget(1)
+    def get_product_by_id(product_id : int) -> Tuple[Response, Literal[200, 400, 404, 500]]:
         try:
-            product = ProductService.get_product_by_id(product_id)
+            product = ProductService.get_product_by_id(product_id, parse_fields(Product))
             if not product:
                 return jsonify({"error": "Product not found"}), 404
 
             return jsonify(product), 200
+        except FieldsError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logging.error("Error in get_product_by_id: %s", str(e), exc_info=True)
+            return jsonify({"error": "Internal Server Error"}), 500
+
+    @staticmethod
+    @swag_from({
+        'tags': ['Product'],
+        'summary': 'Search products',
+        'description': 'Full-text search over name and description, best match first. Returns {"items", "next_offset", "limit"}.',
+        'parameters': [
+            {
+                'in': 'query',
+                'name': 'q',
+                'description': 'Words to search in the name and description, the last one as a prefix',
+                'required': True,
+                'schema': {
+                    'type': 'string',
+                    'example': 'cadeira'
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'limit',
+                'required': False,
+                'schema': {
+                    'type': 'integer'
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'offset',
+                'required': False,
+                'schema': {
+                    'type': 'integer'
+                }
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Page of matching products'
+            },
+            400: {
+                'description': 'Invalid search parameters'
+            },
+            500: {
+                'description': 'Internal Server Error'
+            }
+        }
+    })
+    @conditional_on("product")
+    @query_budget(1)
+    def search_products() -> Tuple[Response, Literal[200, 400, 500]]:
+        try:
+            search, limit, offset = parse_search_args()
+            page = ProductService.search_products(search, limit, offset)
+            if page is None:
+                return jsonify({"error": "Internal Server Error"}), 500
+
+            return jsonify(page), 200
+        except SearchError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logging.error(f"Error in get_product_by_id: {str(e)}", exc_info=True)
+            logging.error("Error in search_products: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -171,6 +386,8 @@ class ProductController:
             }
         }
     })
+    @conditional_on("product")
+    @query_budget(1)
     def get_product_by_name(name : str) -> Tuple[Response, Literal[200, 404, 500]]:
         try:
             product = ProductService.get_product_by_name(name)
@@ -179,7 +396,7 @@ class ProductController:
 
             return jsonify(product), 200
         except Exception as e:
-            logging.error(f"Error in get_product_by_name: {str(e)}", exc_info=True)
+            logging.error("Error in get_product_by_name: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -238,7 +455,7 @@ class ProductController:
     def update_product() -> Tuple[Response, Literal[200, 404, 500 ,400]]:
         try:
             data = request.json
-            logging.debug(f"Request Data: {data}")
+            logging.debug("Request Data: %s", data)
 
             if not data:
                 return jsonify({"error": "Invalid request, no JSON received"}), 400
@@ -250,7 +467,7 @@ class ProductController:
 
             return jsonify(product), 200
         except Exception as e:
-            logging.error(f"Error in update_product: {str(e)}", exc_info=True)
+            logging.error("Error in update_product: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -290,7 +507,7 @@ class ProductController:
 
             return jsonify(product), 200
         except Exception as e:
-            logging.error(f"Error in delete_product: {str(e)}", exc_info=True)
+            logging.error("Error in delete_product: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -330,7 +547,7 @@ class ProductController:
 
             return jsonify(product), 200
         except Exception as e:
-            logging.error(f"Error in delete_product_by_name: {str(e)}", exc_info=True)
+            logging.error("Error in delete_product_by_name: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -368,7 +585,7 @@ class ProductController:
     def update_product_description(product_id : int) -> Tuple[Response, Literal[200, 404, 500 ,400]]:
         try:
             data = request.json
-            logging.debug(f"Request Data: {data}")
+            logging.debug("Request Data: %s", data)
 
             if not data:
                 return jsonify({"error": "Invalid request, no JSON received"}), 400
@@ -380,7 +597,7 @@ class ProductController:
 
             return jsonify(product), 200
         except Exception as e:
-            logging.error(f"Error in update_product_description: {str(e)}", exc_info=True)
+            logging.error("Error in update_product_description: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -418,7 +635,7 @@ class ProductController:
     def update_product_price(product_id : int) -> Tuple[Response, Literal[200, 404, 500 , 400]]:
         try:
             data = request.json
-            logging.debug(f"Request Data: {data}")
+            logging.debug("Request Data: %s", data)
 
             if not data:
                 return jsonify({"error": "Invalid request, no JSON received"}), 400
@@ -430,7 +647,7 @@ class ProductController:
 
             return jsonify(product), 200
         except Exception as e:
-            logging.error(f"Error in update_product_price: {str(e)}", exc_info=True)
+            logging.error("Error in update_product_price: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -468,7 +685,7 @@ class ProductController:
     def update_product_stock(product_id : int) -> Tuple[Response, Literal[200, 404, 500 , 400]]:
         try:
             data = request.json
-            logging.debug(f"Request Data: {data}")
+            logging.debug("Request Data: %s", data)
 
             if not data:
                 return jsonify({"error": "Invalid request, no JSON received"}), 400
@@ -480,5 +697,5 @@ class ProductController:
 
             return jsonify(product), 200
         except Exception as e:
-            logging.error(f"Error in update_product_stock: {str(e)}", exc_info=True)
+            logging.error("Error in update_product_stock: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
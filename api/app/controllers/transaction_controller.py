@@ -3,15 +3,57 @@ import logging
 from flask import request
 from typing import Literal, Tuple
 from flask import jsonify, Response
-from flasgger import swag_from
+from app.docs import swag_from
 
+from app.models.transaction import Transaction
 from app.services.transaction_service import TransactionService
+from app.middlewares.sql_timing import query_budget
+from app.utils.date_range import DateRangeError, parse_date_range
+from app.utils.etag import conditional_on
+from app.utils.fields import FieldsError, parse_fields
+from app.utils.pagination import PaginationError, parse_page_args, wants_all
+from app.utils.streaming import ndjson_response, wants_ndjson
 
 class TransactionController:
     @staticmethod
     @swag_from({
         'tags': ['Transaction'],
-        'parameters': [],
+        'parameters': [
+            {
+                'in': 'query',
+                'name': 'fields',
+                'description': 'Comma-separated keys to return, e.g. id,total,status; only those columns are read',
+                'required': False,
+                'schema': {
+                    'type': 'string'
+                }
+            },
+            {
+                'in': 'query',
+                'name': 'limit',
+                'schema': {
+                    'type': 'integer'
+                },
+                'required': False
+            },
+            {
+                'in': 'query',
+                'name': 'after',
+                'schema': {
+                    'type': 'integer'
+                },
+                'required': False
+            },
+            {
+                'in': 'query',
+                'name': 'all',
+                'description': 'all=1 returns the whole list instead of a page',
+                'required': False,
+                'schema': {
+                    'type': 'boolean'
+                }
+            }
+        ],
         'responses': {
             200: {
                 'description': 'Get all transactions',
@@ -50,18 +92,225 @@ class TransactionController:
             }
         }
     })  
+    @conditional_on("transaction")
+    @query_budget(1)
     def get_all_transactions():
         try:
-            transactions = TransactionService.get_all_transactions()
-            return jsonify(transactions), 200
+            fields = parse_fields(Transaction)
+            if wants_ndjson():
+                return ndjson_response(TransactionService.stream_transactions(fields))
+
+            if wants_all():
+                transactions = TransactionService.get_all_transactions(fields)
+                return jsonify(transactions), 200
+
+            limit, after = parse_page_args()
+            page = TransactionService.get_transactions_page(limit, after, fields)
+            if not isinstance(page, dict) or "error" in page:
+                return jsonify({"error": "Internal Server Error"}), 500
+
+            return jsonify(page), 200
+        except (PaginationError, FieldsError) as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logging.error(f"Error in Transaction.get_all_transactions: {str(e)}")
+            logging.error("Error in Transaction.get_all_transactions: %s", str(e))
             return jsonify({"error": "Internal Server Error"}), 500
     
+    @staticmethod
+    @swag_from({
+        'tags': ['Transaction'],
+        'parameters': [
+            {
+                'in': 'query',
+                'name': 'from',
+                'description': 'Start date (inclusive), ISO 8601',
+                'schema': {
+                    'type': 'string'
+                },
+                'required': False
+            },
+            {
+                'in': 'query',
+                'name': 'to',
+                'description': 'End date (inclusive), ISO 8601',
+                'schema': {
+                    'type': 'string'
+                },
+                'required': False
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Count, quantity, total and average total of the transactions',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'count': {'type': 'integer'},
+                                'quantity': {'type': 'integer'},
+                                'total': {'type': 'number'},
+                                'average_total': {'type': 'number'}
+                            }
+                        }
+                    }
+                }
+            },
+            400: {
+                'description': 'Invalid date range',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            },
+            500: {
+                'description': 'Internal Server Error',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    })
+    @conditional_on("transaction")
+    @query_budget(1)
+    def get_transaction_stats():
+        try:
+            start, end = parse_date_range()
+            stats = TransactionService.get_transaction_stats(None, start, end)
+            if stats is None:
+                return jsonify({"error": "Internal Server Error"}), 500
+            return jsonify(stats), 200
+        except DateRangeError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logging.error("Error in Transaction.get_transaction_stats: %s", str(e))
+            return jsonify({"error": "Internal Server Error"}), 500
+
     @staticmethod
     @swag_from({
         'tags': ['Transaction'],
         'parameters': [
+            {
+                'in': 'path',
+                'name': 'group_by',
+                'schema': {
+                    'type': 'string',
+                    'enum': ['product', 'user', 'status', 'day']
+                },
+                'required': True
+            },
+            {
+                'in': 'query',
+                'name': 'from',
+                'description': 'Start date (inclusive), ISO 8601',
+                'schema': {
+                    'type': 'string'
+                },
+                'required': False
+            },
+            {
+                'in': 'query',
+                'name': 'to',
+                'description': 'End date (inclusive), ISO 8601',
+                'schema': {
+                    'type': 'string'
+                },
+                'required': False
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Transaction stats per product, user, status or day, ordered by the group key',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'product_id': {'type': 'integer'},
+                                    'user_id': {'type': 'integer'},
+                                    'status': {'type': 'string'},
+                                    'day': {'type': 'string'},
+                                    'count': {'type': 'integer'},
+                                    'quantity': {'type': 'integer'},
+                                    'total': {'type': 'number'},
+                                    'average_total': {'type': 'number'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            400: {
+                'description': 'Invalid date range',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            },
+            500: {
+                'description': 'Internal Server Error',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    })
+    @conditional_on("transaction")
+    @query_budget(1)
+    def get_transaction_stats_by(group_by: str):
+        try:
+            start, end = parse_date_range()
+            stats = TransactionService.get_transaction_stats(group_by, start, end)
+            if stats is None:
+                return jsonify({"error": "Internal Server Error"}), 500
+            return jsonify(stats), 200
+        except DateRangeError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logging.error("Error in Transaction.get_transaction_stats_by: %s", str(e))
+            return jsonify({"error": "Internal Server Error"}), 500
+
+    @staticmethod
+    @swag_from({
+        'tags': ['Transaction'],
+        'parameters': [
+            {
+                'in': 'query',
+                'name': 'fields',
+                'description': 'Comma-separated keys to return, e.g. id,total,status; only those columns are read',
+                'required': False,
+                'schema': {
+                    'type': 'string'
+                }
+            },
             {
                 'in': 'path',
                 'name': 'transaction_id',
@@ -119,20 +368,33 @@ class TransactionController:
             }
         }
     })
+    @conditional_on("transaction")
+    @query_budget(1)
     def get_transaction_by_id(transaction_id: int):
         try:
-            transaction = TransactionService.get_transaction_by_id(transaction_id)
+            transaction = TransactionService.get_transaction_by_id(transaction_id, parse_fields(Transaction))
             if transaction:
                 return jsonify(transaction), 200
             return jsonify({"error": "Transaction not found"}), 404
+        except FieldsError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logging.error(f"Error in Transaction.get_transaction_by_id: {str(e)}")
+            logging.error("Error in Transaction.get_transaction_by_id: %s", str(e))
             return jsonify({"error": "Internal Server Error"}), 500
     
     @staticmethod
     @swag_from({
         'tags': ['Transaction'],
         'parameters': [
+            {
+                'in': 'query',
+                'name': 'fields',
+                'description': 'Comma-separated keys to return, e.g. id,total,status; only those columns are read',
+                'required': False,
+                'schema': {
+                    'type': 'string'
+                }
+            },
             {
                 'in': 'path',
                 'name': 'user_id',
@@ -190,17 +452,22 @@ class TransactionController:
             }
         }
     })
+    @conditional_on("transaction")
+    @query_budget(1)
     def get_transaction_by_user_id(user_id: int):
         try:
-            transaction = TransactionService.get_transaction_by_user_id(user_id)
+            transaction = TransactionService.get_transaction_by_user_id(user_id, parse_fields(Transaction))
             if transaction:
                 return jsonify(transaction), 200
             return jsonify({"error": "Transaction not found"}), 404
+        except FieldsError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logging.error(f"Error in Transaction.get_transaction_by_user_id: {str(e)}")
+            logging.error("Error in Transaction.get_transaction_by_user_id: %s", str(e))
             return jsonify({"error": "Internal Server Error"}), 500
         
     @staticmethod
+    @query_budget(5)
     def create_transaction():
         try:
             data = request.get_json()
@@ -214,7 +481,7 @@ class TransactionController:
             
             return jsonify({"error": "Bad Request"}), 400
         except Exception as e:
-            logging.error(f"Error in Transaction.create_transaction: {str(e)}")
+            logging.error("Error in Transaction.create_transaction: %s", str(e))
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -290,6 +557,19 @@ class TransactionController:
                     }
                 }
             },
+            409: {
+                'description': 'Stock unavailable',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            },
             500: {
                 'description': 'Internal Server Error',
                 'content': {
@@ -311,11 +591,13 @@ class TransactionController:
             if data is None:
                 return jsonify({"error": "Bad Request: JSON não fornecido"}), 400
             transaction = TransactionService.update_transaction(data['transaction_id'], data)
+            if isinstance(transaction, dict) and "error" in transaction:
+                return jsonify(transaction), 409
             if transaction:
                 return jsonify(transaction), 200
             return jsonify({"error": "Transaction not found"}), 404
         except Exception as e:
-            logging.error(f"Error in Transaction.update_transaction: {str(e)}")
+            logging.error("Error in Transaction.update_transaction: %s", str(e))
             return jsonify({"error": "Internal Server Error"}), 500
     
     @staticmethod
@@ -386,27 +668,20 @@ class TransactionController:
                 return jsonify(transaction), 200
             return jsonify({"error": "Transaction not found"}), 404
         except Exception as e:
-            logging.error(f"Error in Transaction.delete_transaction: {str(e)}")
+            logging.error("Error in Transaction.delete_transaction: %s", str(e))
             return jsonify({"error": "Internal Server Error"}), 500
         
     @staticmethod
     @swag_from({
         'tags': ['Transaction'],
         'parameters': [
-            {
-                'in': 'path',
-                'name': 'transaction_id',
-                'schema': {
-                    'type': 'integer'
-                },
-                'required': True
-            },
             {
                 'in': 'body',
                 'name': 'status',
                 'schema': {
                     'type': 'object',
                     'properties': {
+                        'transaction_id': {'type': 'integer'},
                         'status': {'type': 'string'}
                     }
                 },
@@ -433,8 +708,34 @@ class TransactionController:
                     }
                 }
             },
+            400: {
+                'description': 'Bad Request',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            },
             404: {
-                'description': 'Transaction not found',
+                'description': 'Transaction or status not found',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            },
+            409: {
+                'description': 'Stock unavailable',
                 'content': {
                     'application/json': {
                         'schema': {
@@ -461,12 +762,20 @@ class TransactionController:
             }
         }
     })
-    def update_transaction_status(transaction_id: int, status: str):
+    def update_transaction_status():
         try:
-            transaction = TransactionService.update_transaction_status(transaction_id, status)
+            data = request.get_json()
+            if data is None:
+                return jsonify({"error": "Bad Request: JSON não fornecido"}), 400
+            if "transaction_id" not in data or "status" not in data:
+                return jsonify({"error": "Bad Request: 'transaction_id' e 'status' são obrigatórios"}), 400
+
+            transaction = TransactionService.update_transaction_status(data["transaction_id"], data["status"])
+            if isinstance(transaction, dict) and "error" in transaction:
+                return jsonify(transaction), 409
             if transaction:
                 return jsonify(transaction), 200
-            return jsonify({"error": "Transaction not found"}), 404
+            return jsonify({"error": "Transaction or status not found"}), 404
         except Exception as e:
-            logging.error(f"Error in Transaction.update_transaction_status: {str(e)}")
+            logging.error("Error in Transaction.update_transaction_status: %s", str(e))
             return jsonify({"error": "Internal Server Error"}), 500
\ No newline at end of file
@@ -1,17 +1,54 @@
 import logging
 
-from flask import request, jsonify
+from flask import current_app, request, jsonify
 from typing import Literal, Tuple
 from flask import Response
-from flasgger import swag_from
+from app.docs import swag_from
 
+from app.models.user import User
 from app.services.user_service import UserService
+from app.middlewares.sql_timing import query_budget
+from app.utils.etag import conditional_on
+from app.utils.fields import FieldsError, parse_fields
+from app.utils.pagination import PaginationError, parse_page_args, wants_all
+from app.utils.search import SearchError, parse_search_args
+from app.utils.streaming import NDJSON_MIMETYPE, iter_ndjson, ndjson_response, wants_ndjson
 
 
 class UserController:
     @staticmethod
     @swag_from({
         'tags': ['User'],
+        'parameters': [
+            {
+                'name': 'fields',
+                'in': 'query',
+                'required': False,
+                'type': 'string',
+                'description': 'Comma-separated keys to return, e.g. id,name; only those columns are read'
+            },
+            {
+                'name': 'limit',
+                'in': 'query',
+                'required': False,
+                'type': 'integer',
+                'description': 'Page size (capped by MAX_PAGE_SIZE). Without all=1 the response is a page object.'
+            },
+            {
+                'name': 'after',
+                'in': 'query',
+                'required': False,
+                'type': 'integer',
+                'description': 'Cursor returned as next_cursor by the previous page'
+            },
+            {
+                'name': 'all',
+                'in': 'query',
+                'required': False,
+                'type': 'boolean',
+                'description': 'all=1 returns the whole list instead of a page'
+            }
+        ],
         'responses': {
             200: {
                 'description': 'A list of users',
@@ -38,16 +75,31 @@ class UserController:
             }
         }
     })
+    @conditional_on("user")
+    @query_budget(1)
     def get_users():
         try:
-            users = UserService.get_all_users()
-            if isinstance(users, dict) and "error" in users:
-                return jsonify(users), 500
+            fields = parse_fields(User)
+            if wants_ndjson():
+                return ndjson_response(UserService.stream_users(fields))
+
+            if wants_all():
+                users = UserService.get_all_users(fields)
+                if isinstance(users, dict) and "error" in users:
+                    return jsonify(users), 500
 
-            logging.info(f"Fetched {len(users)} users")
-            return jsonify(users), 200
+                return jsonify(users), 200
+
+            limit, after = parse_page_args()
+            page = UserService.get_users_page(limit, after, fields)
+            if not isinstance(page, dict) or "error" in page:
+                return jsonify({"error": "Internal Server Error"}), 500
+
+            return jsonify(page), 200
+        except (PaginationError, FieldsError) as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logging.error(f"Error in get_users: {str(e)}", exc_info=True)
+            logging.error("Error in get_users: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -114,7 +166,7 @@ class UserController:
     def create_user():
         try:
             data = request.json
-            logging.debug(f"Request Data: {data}")
+            logging.debug("Request Data: %s", data)
 
             if not data:
                 return jsonify({"error": "Invalid request, no JSON received"}), 400
@@ -126,13 +178,126 @@ class UserController:
 
             return jsonify(user), 201
         except Exception as e:
-            logging.error(f"Error in create_user: {str(e)}", exc_info=True)
+            logging.error("Error in create_user: %s", str(e), exc_info=True)
+            return jsonify({"error": "Internal Server Error"}), 500
+
+    @staticmethod
+    @swag_from({
+        'tags': ['User'],
+        'consumes': ['application/json', 'application/x-ndjson'],
+        'parameters': [
+            {
+                'name': 'chunk_size',
+                'in': 'query',
+                'required': False,
+                'type': 'integer',
+                'description': 'Users inserted per DB transaction (default BULK_CHUNK_SIZE)'
+            },
+            {
+                'name': 'body',
+                'in': 'body',
+                'required': True,
+                'description': 'JSON array of users, or one user per line with Content-Type application/x-ndjson',
+                'schema': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'name': {'type': 'string'},
+                            'email': {'type': 'string'},
+                            'document': {'type': 'string'}
+                        },
+                        'required': ['name', 'email', 'document']
+                    }
+                }
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Per-item results of the bulk creation',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'summary': {
+                            'type': 'object',
+                            'properties': {
+                                'created': {'type': 'integer'},
+                                'conflict': {'type': 'integer'},
+                                'invalid': {'type': 'integer'},
+                                'error': {'type': 'integer'}
+                            }
+                        },
+                        'results': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'index': {'type': 'integer'},
+                                    'status': {'type': 'string'},
+                                    'id': {'type': 'integer'},
+                                    'error': {'type': 'string'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            400: {
+                'description': 'Invalid request',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            500: {
+                'description': 'Internal Server Error',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'error': {'type': 'string'}
+                    }
+                }
+            }
+        }
+    })
+    def create_users_bulk():
+        try:
+            if request.mimetype == NDJSON_MIMETYPE:
+                items = [item for _, item in iter_ndjson(request.stream)]
+            else:
+                items = request.get_json(silent=True)
+
+            if not isinstance(items, list) or not items:
+                return jsonify({"error": "Invalid request, expected a non-empty JSON array or NDJSON body"}), 400
+
+            chunk_size = request.args.get("chunk_size", current_app.config["BULK_CHUNK_SIZE"], type=int)
+            if chunk_size < 1:
+                return jsonify({"error": "Invalid request, 'chunk_size' must be greater than zero"}), 400
+
+            result = UserService.bulk_create_users(items, chunk_size)
+            if not isinstance(result, dict) or "error" in result:
+                return jsonify({"error": "Internal Server Error"}), 500
+
+            return jsonify(result), 200
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logging.error("Error in create_users_bulk: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
     @swag_from({
         'tags': ['User'],
         'parameters': [
+            {
+                'name': 'fields',
+                'in': 'query',
+                'required': False,
+                'type': 'string',
+                'description': 'Comma-separated keys to return, e.g. id,name; only those columns are read'
+            },
             {
                 'name': 'user_id',
                 'in': 'path',
@@ -172,15 +337,161 @@ class UserController:
             }
         }
     })
-    def get_user_by_id(user_id: int) -> Tuple[Response, Literal[404, 200, 500]]:
+    @conditional_on("user")
+    @query_budget(1)
+    def get_user_by_id(user_id: int) -> Tuple[Response, Literal[400, 404, 200, 500]]:
         try:
-            user = UserService.get_user_by_id(user_id)
+            user = UserService.get_user_by_id(user_id, parse_fields(User))
             if not user:
                 return jsonify({"error": "User not found"}), 404
 
             return jsonify(user), 200
+        except FieldsError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            logging.error("Error in get_user_by_id: %s", str(e), exc_info=True)
+            return jsonify({"error": "Internal Server Error"}), 500
+
+    @staticmethod
+    @swag_from({
+        'tags': ['User'],
+        'parameters': [
+            {
+                'name': 'user_id',
+                'in': 'path',
+                'required': True,
+                'type': 'integer'
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Transaction count, quantity, total spent, last transaction date and count per status of the user',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'user_id': {'type': 'integer'},
+                        'transaction_count': {'type': 'integer'},
+                        'quantity': {'type': 'integer'},
+                        'total_spent': {'type': 'number'},
+                        'last_transaction_date': {'type': 'string'},
+                        'status_counts': {'type': 'object', 'additionalProperties': {'type': 'integer'}}
+                    }
+                }
+            },
+            404: {
+                'description': 'User not found',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            500: {
+                'description': 'Internal Server Error',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'error': {'type': 'string'}
+                    }
+                }
+            }
+        }
+    })
+    @conditional_on("user", "transaction")
+    @query_budget(2)
+    def get_user_summary(user_id: int) -> Tuple[Response, Literal[404, 200, 500]]:
+        try:
+            summary = UserService.get_user_summary(user_id)
+            if not summary:
+                return jsonify({"error": "User not found"}), 404
+
+            return jsonify(summary), 200
+        except Exception as e:
+            logging.error("Error in get_user_summary: %s", str(e), exc_info=True)
+            return jsonify({"error": "Internal Server Error"}), 500
+
+    @staticmethod
+    @swag_from({
+        'tags': ['User'],
+        'parameters': [
+            {
+                'name': 'q',
+                'in': 'query',
+                'required': True,
+                'type': 'string',
+                'description': 'Words to search in the name and email, the last one as a prefix'
+            },
+            {
+                'name': 'limit',
+                'in': 'query',
+                'required': False,
+                'type': 'integer'
+            },
+            {
+                'name': 'offset',
+                'in': 'query',
+                'required': False,
+                'type': 'integer'
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Page of matching users, best match first',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'items': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'id': {'type': 'integer'},
+                                    'name': {'type': 'string'},
+                                    'email': {'type': 'string'},
+                                    'document': {'type': 'string'}
+                                }
+                            }
+                        },
+                        'next_offset': {'type': 'integer'},
+                        'limit': {'type': 'integer'}
+                    }
+                }
+            },
+            400: {
+                'description': 'Invalid search parameters',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            500: {
+                'description': 'Internal Server Error',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'error': {'type': 'string'}
+                    }
+                }
+            }
+        }
+    })
+    @conditional_on("user")
+    @query_budget(1)
+    def search_users() -> Tuple[Response, Literal[400, 200, 500]]:
+        try:
+            search, limit, offset = parse_search_args()
+            page = UserService.search_users(search, limit, offset)
+            if page is None:
+                return jsonify({"error": "Internal Server Error"}), 500
+
+            return jsonify(page), 200
+        except SearchError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            logging.error(f"Error in get_user_by_id: {str(e)}", exc_info=True)
+            logging.error("Error in search_users: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -226,6 +537,8 @@ class UserController:
             }
         }
     })
+    @conditional_on("user")
+    @query_budget(1)
     def get_user_by_name(name : str) -> Tuple[Response, Literal[404, 200, 500]]:
         try:
             user = UserService.get_user_by_name(name)
@@ -234,7 +547,7 @@ class UserController:
 
             return jsonify(user), 200
         except Exception as e:
-            logging.error(f"Error in get_user_by_name: {str(e)}", exc_info=True)
+            logging.error("Error in get_user_by_name: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -280,6 +593,8 @@ class UserController:
             }
         }
     })
+    @conditional_on("user")
+    @query_budget(1)
     def get_user_by_email(email : str) -> Tuple[Response, Literal[404, 200, 500]]:
         try:
             user = UserService.get_user_by_email(email)
@@ -288,7 +603,7 @@ class UserController:
 
             return jsonify(user), 200
         except Exception as e:
-            logging.error(f"Error in get_user_by_email: {str(e)}", exc_info=True)
+            logging.error("Error in get_user_by_email: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -356,7 +671,7 @@ class UserController:
     def update_user() -> Tuple[Response, Literal[400, 404, 200, 500]]:
         try:
             data = request.json
-            logging.debug(f"Request Data: {data}")
+            logging.debug("Request Data: %s", data)
 
             if not data:
                 return jsonify({"error": "Invalid request, no JSON received"}), 400
@@ -368,7 +683,7 @@ class UserController:
 
             return jsonify(user), 200
         except Exception as e:
-            logging.error(f"Error in update_user: {str(e)}", exc_info=True)
+            logging.error("Error in update_user: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -422,7 +737,7 @@ class UserController:
 
             return jsonify({"user": user["name"], "status":"deleted"}), 200
         except Exception as e:
-            logging.error(f"Error in delete_user: {str(e)}", exc_info=True)
+            logging.error("Error in delete_user: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
 
     @staticmethod
@@ -468,6 +783,8 @@ class UserController:
             }
         }
     })  
+    @conditional_on("user")
+    @query_budget(1)
     def get_user_by_document(document : str) -> Tuple[Response, Literal[404, 200, 500]]:
         try:
             user = UserService.get_user_by_document(document)
@@ -476,5 +793,5 @@ class UserController:
 
             return jsonify(user), 200
         except Exception as e:
-            logging.error(f"Error in get_user_by_document: {str(e)}", exc_info=True)
+            logging.error("Error in get_user_by_document: %s", str(e), exc_info=True)
             return jsonify({"error": "Internal Server Error"}), 500
@@ -1,3 +1,108 @@
+import logging
+import os
+from contextlib import contextmanager
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
 
 db = SQLAlchemy()
+
+_ON_COMMIT = "on_commit"
+
+
+def on_commit(callback, *args):
+    """
+    Runs ``callback(*args)`` once the current transaction commits, and drops it on rollback.
+
+    Used for process-local side effects, like cache invalidation, that must not happen before
+    the data is visible to other sessions. The callback cannot use the session.
+    """
+    db.session.info.setdefault(_ON_COMMIT, []).append((callback, args))
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session):
+    for callback, args in session.info.pop(_ON_COMMIT, ()):
+        try:
+            callback(*args)
+        except Exception as e:
+            logging.error("Error in on_commit callback %r: %s", callback, str(e), exc_info=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_commit(session):
+    session.info.pop(_ON_COMMIT, None)
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Commits the session when the block succeeds and rolls it back otherwise. Requests get this
+    from init_unit_of_work(), it is meant for CLI commands and scripts.
+    """
+    try:
+        yield db.session
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def configure_database_profile(app):
+    """
+    Applies the database profile selected by the DATABASE_PROFILE env var.
+
+    "debug" (default) keeps the stock engine settings. "production" uses a QueuePool with explicit
+    limits and, on SQLite, sets WAL journal mode and the other SQLITE_* pragmas on every new connection.
+    """
+    profile = os.getenv("DATABASE_PROFILE", "debug")
+    app.config["DATABASE_PROFILE"] = profile
+    if profile != "production":
+        return
+
+    engine_options = {
+        "poolclass": QueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "10")),
+    }
+
+    if make_url(app.config["SQLALCHEMY_DATABASE_URI"]).get_backend_name() == "sqlite":
+        busy_timeout_ms = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        # Pooled connections are shared between the threads of a worker
+        engine_options["connect_args"] = {"check_same_thread": False, "timeout": busy_timeout_ms / 1000}
+        app.config["SQLITE_PRAGMAS"] = {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": busy_timeout_ms,
+            "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+            # negative values are KiB instead of pages
+            "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024))),
+            "temp_store": "MEMORY",
+        }
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**engine_options, **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
+
+
+def register_sqlite_pragmas(app):
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    if not pragmas:
+        return
+
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, pragmas)
+
+    logging.info("SQLite pragmas enabled: %s", pragmas)
+
+
+def apply_sqlite_pragmas(engine, pragmas : dict):
+    """Sets ``pragmas`` on every new connection of a (sync) engine."""
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
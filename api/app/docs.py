@@ -0,0 +1,120 @@
+"""
+Swagger documentation (flasgger), served at /apidocs and /apispec_1.json.
+
+flasgger is only imported when API_DOCS_ENABLED is not "False". The spec is assembled once, on the
+first request or from the API_SPEC_FILE artifact written by ``flask docs export``, and served as
+the same JSON bytes afterwards.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import click
+from flask import Response, current_app, request
+
+SPEC_ENDPOINT = "apispec_1"
+
+
+def swag_from(specs : dict):
+    """
+    Attaches an OpenAPI operation to a view, as flasgger.swag_from does with a dict, without
+    importing flasgger in the controllers.
+    """
+    def decorator(function):
+        function.specs_dict = specs
+        return function
+
+    return decorator
+
+
+def swagger_template(app):
+    return {
+        "swagger": "2.0",
+        "info": {
+            "title": "API de Testes para QAs",
+            "contact": {
+                "name": "Flavio Ramos",
+                "email": "flavior.desouza@gmail.com"},
+            "license": {
+                "name": "MIT License",
+                "url": "https://opensource.org/licenses/MIT"
+            },
+            "description": "API de Testes para QAs, com endpoints para usuários e produtos e documentação com Swagger, para treinamento de testes automatizados.",
+            "version": "1.0.0"
+        },
+        "host": f"localhost:{app.config['FLASK_RUN_PORT']}",
+        "basePath": "/",
+        "schemes": ["http"],
+        "paths": {},
+    }
+
+
+class SpecCache:
+    def __init__(self):
+        self.body = None
+        self.etag = None
+        self._lock = threading.Lock()
+
+    def load(self, body : bytes):
+        self.etag = hashlib.sha1(body).hexdigest()[:16]
+        self.body = body
+
+    def get(self, app):
+        if self.body is None:
+            with self._lock:
+                if self.body is None:
+                    self.load(build_spec(app))
+        return self.body
+
+
+def build_spec(app):
+    with app.app_context():
+        spec = app.swag.get_apispecs(SPEC_ENDPOINT)
+    return json.dumps(spec, separators=(",", ":"), sort_keys=True, default=str).encode()
+
+
+def _serve_spec():
+    cache : SpecCache = current_app.extensions["api_spec"]
+    body = cache.get(current_app)
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(cache.etag)
+    return response.make_conditional(request)
+
+
+def init_docs(app):
+    if not app.config["API_DOCS_ENABLED"]:
+        return
+
+    from flasgger import Swagger # type: ignore
+
+    Swagger(app, template=swagger_template(app))
+
+    cache = SpecCache()
+    spec_file = app.config.get("API_SPEC_FILE")
+    if spec_file and os.path.exists(spec_file):
+        with open(spec_file, "rb") as f:
+            cache.load(f.read())
+        logging.info("API spec loaded from %s", spec_file)
+
+    app.extensions["api_spec"] = cache
+    app.view_functions[f"flasgger.{SPEC_ENDPOINT}"] = _serve_spec
+
+    @app.cli.group("docs")
+    def docs_cli():
+        """Swagger documentation."""
+
+    @docs_cli.command("export")
+    @click.argument("path", required=False)
+    def export_spec(path):
+        """Writes the spec to PATH (default: API_SPEC_FILE), to be served without building it."""
+        path = path or app.config.get("API_SPEC_FILE")
+        if not path:
+            raise click.UsageError("Pass a PATH or set API_SPEC_FILE")
+
+        body = build_spec(app)
+        with open(path, "wb") as f:
+            f.write(body)
+        click.echo(f"API spec written to {path} ({len(body)} bytes)")
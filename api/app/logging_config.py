@@ -0,0 +1,136 @@
+"""
+Logging setup shared by ``main.py`` and the gunicorn workers.
+
+Request threads only put records on an in-memory queue; a QueueListener thread formats them as
+JSON lines and writes them to stderr, so slow writes never block a request.
+
+Environment:
+    LOG_LEVEL: root level (default: INFO)
+    LOG_LEVELS: per-logger levels, e.g. "app.sql.slow=WARNING,werkzeug=ERROR"
+    LOG_INFO_SAMPLE_RATE: fraction of INFO records kept, between 0 and 1 (default: 1)
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+request_id_var = ContextVar("request_id", default=None)
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class InfoSamplingFilter(logging.Filter):
+    """Keeps a random ``rate`` fraction of the INFO records, every other level goes through."""
+
+    def __init__(self, rate : float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno != logging.INFO or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Interpolates the message and renders the traceback before queueing, as the arguments may
+    change or go away once the call returns, and leaves the JSON formatting to the listener.
+    """
+
+    def prepare(self, record):
+        # This is the only handler on the root logger, so the record can be changed in place
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_traceback_formatter = logging.Formatter()
+
+
+def _parse_levels(spec : str):
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def configure_logging():
+    """
+    Installs the queue handler on the root logger and starts the listener thread.
+
+    Must be called again in forked children, where the listener thread of the parent does not exist.
+    """
+    global _listener
+
+    # JsonFormatter never writes the caller, skip the stack walk done for every record
+    # (see "Optimization" in the logging HOWTO).
+    logging._srcfile = None
+
+    # In a forked child the old thread is gone and its queue may hold a lock taken at fork time,
+    # so it is dropped instead of stopped.
+    if _listener is not None and _listener._thread is not None and _listener._thread.is_alive():
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    sample_rate = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1"))
+    if sample_rate < 1:
+        queue_handler.addFilter(InfoSamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    for name, level in _parse_levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+atexit.register(_stop_listener)
@@ -0,0 +1,193 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+gzip is always available; zstd and br are offered when the zstandard and brotli (or brotlicffi)
+packages are installed. Bodies under COMPRESSION_MIN_SIZE bytes are sent as they are. Streamed
+responses (NDJSON) are compressed chunk by chunk and flushed after each chunk, so the client
+still receives the rows while they are read.
+"""
+import zlib
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+from app.utils.streaming import NDJSON_MIMETYPE
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = frozenset(("application/json", NDJSON_MIMETYPE, "application/javascript", "image/svg+xml"))
+
+
+class GzipCompressor:
+    def __init__(self, level : int):
+        # wbits 31: gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data : bytes):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level : int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data : bytes):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level : int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data : bytes):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Content-Encoding -> compressor and the config key of its level, for the installed libraries
+CODECS = {"gzip": (GzipCompressor, "COMPRESSION_GZIP_LEVEL")}
+if brotli is not None:
+    CODECS["br"] = (BrotliCompressor, "COMPRESSION_BROTLI_LEVEL")
+if zstandard is not None:
+    CODECS["zstd"] = (ZstdCompressor, "COMPRESSION_ZSTD_LEVEL")
+
+
+def enabled_encodings(config):
+    """The encodings of COMPRESSION_ENCODINGS that are installed, in the server's order of preference."""
+    names = (name.strip() for name in config["COMPRESSION_ENCODINGS"].split(","))
+    return [name for name in names if name in CODECS]
+
+
+def negotiate(accept_encoding : str | None, encodings : list):
+    """
+    The encoding of ``encodings`` with the highest quality in the Accept-Encoding header, ties
+    going to the first one. None when the client accepts none of them.
+    """
+    accept = parse_accept_header(accept_encoding)
+    best, best_quality = None, 0
+    for name in encodings:
+        quality = accept.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def new_compressor(encoding : str, config):
+    compressor, level_key = CODECS[encoding]
+    return compressor(config[level_key])
+
+
+def compress_body(data : bytes, compressor):
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, compressor):
+    """Compresses an iterable of bytes, flushing after every chunk."""
+    for chunk in chunks:
+        if chunk:
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+    yield compressor.finish()
+
+
+def etag_variants(etag : str):
+    """The ETag of every representation of a response tagged ``etag``: as it is and once per encoding."""
+    return (etag, *(f"{etag}-{encoding}" for encoding in CODECS))
+
+
+def _is_compressible(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or "Content-Encoding" in response.headers or response.cache_control.no_transform:
+        return False
+    return response.mimetype.startswith("text/") or response.mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def init_compression(app):
+    """
+    Registered after the metrics and before the unit of work: Flask runs the after_request hooks in
+    reverse order, so the body that gets compressed is the one after the commit, and the latency
+    metrics include the compression.
+    """
+    encodings = enabled_encodings(app.config)
+    if not app.config["COMPRESSION_ENABLED"] or not encodings:
+        return
+
+    min_size = app.config["COMPRESSION_MIN_SIZE"]
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code == 304:
+            # Same Vary as the full response, for the caches revalidating it
+            response.vary.add("Accept-Encoding")
+            return response
+
+        if not _is_compressible(response):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate(request.headers.get("Accept-Encoding"), encodings)
+        if encoding is None:
+            return response
+
+        compressor = new_compressor(encoding, app.config)
+        if response.is_streamed:
+            chunks = response.iter_encoded()
+            original = response.response
+
+            def generate():
+                try:
+                    yield from compress_stream(chunks, compressor)
+                finally:
+                    # Ends stream_with_context() and closes the cursor when the client goes away
+                    close = getattr(original, "close", None)
+                    if close is not None:
+                        close()
+
+            response.response = generate()
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+
+            compressed = compress_body(data, compressor)
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+
+        response.headers["Content-Encoding"] = encoding
+        # Each encoding is a different representation, with its own strong ETag
+        etag, weak = response.get_etag()
+        if etag is not None:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
@@ -0,0 +1,63 @@
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+
+# With PROMETHEUS_MULTIPROC_DIR set, every worker writes its samples to files in that directory
+# and /metrics aggregates all of them, whichever worker answers the scrape.
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LABELS = ("blueprint", "endpoint", "method")
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status code", LABELS + ("status",))
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent in the app for each request, until the response headers are ready",
+    LABELS,
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled", LABELS, multiprocess_mode="livesum")
+STARTUP = Gauge("app_startup_seconds", "Time create_app() took, by phase", ("phase",), multiprocess_mode="max")
+
+
+def _labels():
+    return request.blueprint or "none", request.endpoint or "none", request.method
+
+
+def record_startup(startup : dict):
+    """Called again in every gunicorn worker, as the samples of the master are not exported."""
+    for phase, seconds in startup.items():
+        STARTUP.labels(phase).set(seconds)
+
+
+def init_metrics(app):
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_labels = _labels()
+        IN_FLIGHT.labels(*g.metrics_labels).inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        labels = g.get("metrics_labels")
+        if labels is not None:
+            LATENCY.labels(*labels).observe(time.perf_counter() - g.metrics_start)
+            REQUESTS.labels(*labels, str(response.status_code)).inc()
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        labels = g.pop("metrics_labels", None)
+        if labels is not None:
+            IN_FLIGHT.labels(*labels).dec()
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if MULTIPROCESS:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,34 @@
+import re
+import uuid
+
+from flask import g, request
+
+from app.logging_config import request_id_var
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Ids coming from a proxy are kept as long as they are safe to write to the logs
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def init_request_id(app):
+    @app.before_request
+    def set_request_id():
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        g.request_id = request_id
+        g.request_id_token = request_id_var.set(request_id)
+
+    @app.after_request
+    def add_request_id_header(response):
+        request_id = g.get("request_id")
+        if request_id is not None:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    @app.teardown_request
+    def reset_request_id(exc):
+        token = g.pop("request_id_token", None)
+        if token is not None:
+            request_id_var.reset(token)
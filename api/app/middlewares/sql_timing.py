@@ -0,0 +1,127 @@
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g
+from sqlalchemy import event
+
+from app.db import db
+
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+# Every active collector receives each statement, so a test helper can count the queries of a
+# request that is also being counted by the request hooks.
+_collectors = ContextVar("sql_collectors", default=())
+
+
+class QueryStats:
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def _start_collecting():
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    return stats, token
+
+
+@contextmanager
+def collect_queries():
+    stats, token = _start_collecting()
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def assert_max_queries(budget : int):
+    """
+    Fails when the block runs more than ``budget`` SQL statements, e.g. around a test client call:
+
+        with assert_max_queries(1):
+            client.get("/transactions")
+    """
+    with collect_queries() as stats:
+        yield stats
+
+    if stats.count > budget:
+        raise AssertionError(f"{stats.count} SQL statements executed, budget is {budget}")
+
+
+def query_budget(budget : int):
+    """
+    Declares the maximum number of SQL statements a view may run.
+
+    Over budget, the view fails with AssertionError when QUERY_BUDGET_STRICT is set or the app is
+    TESTING, and only logs a warning otherwise.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with collect_queries() as stats:
+                rv = view(*args, **kwargs)
+
+            if stats.count > budget:
+                message = f"{view.__qualname__} ran {stats.count} SQL statements, budget is {budget}"
+                if current_app.config["QUERY_BUDGET_STRICT"] or current_app.testing:
+                    raise AssertionError(message)
+                logging.warning(message)
+            return rv
+
+        return wrapper
+
+    return decorator
+
+
+def init_sql_timing(app):
+    slow_query_seconds = app.config["SLOW_QUERY_MS"] / 1000
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "query_start", None)
+        if start is None:
+            return
+
+        elapsed = time.perf_counter() - start
+        for stats in _collectors.get():
+            stats.count += 1
+            stats.duration += elapsed
+
+        if elapsed >= slow_query_seconds:
+            slow_query_logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+    @app.before_request
+    def start_request_sql_timing():
+        g.sql_stats, g.sql_token = _start_collecting()
+        g.sql_request_start = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing(response):
+        stats = g.get("sql_stats")
+        if stats is not None:
+            elapsed_ms = (time.perf_counter() - g.sql_request_start) * 1000
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", app;dur={elapsed_ms:.2f}'
+            )
+        return response
+
+    @app.teardown_request
+    def stop_request_sql_timing(exc):
+        token = g.pop("sql_token", None)
+        if token is not None:
+            _collectors.reset(token)
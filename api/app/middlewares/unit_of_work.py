@@ -0,0 +1,36 @@
+import logging
+
+from flask import jsonify, request
+
+from app.db import db
+
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+def init_unit_of_work(app):
+    """
+    One session and one transaction per request: repositories only flush, and the changes of a
+    successful write request are committed here, before the response is sent, so a failed commit
+    still becomes a 500. Error responses are rolled back. Flask-SQLAlchemy removes the session
+    (rolling back whatever is left, e.g. after an exception) when the app context tears down.
+
+    Must be registered after the other after_request hooks, which Flask runs in reverse order,
+    so their timings include the commit.
+    """
+    @app.after_request
+    def commit_unit_of_work(response):
+        if request.method in SAFE_METHODS or not db.session.registry.has():
+            return response
+
+        if response.status_code >= 400:
+            db.session.rollback()
+            return response
+
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error("Error committing %s %s: %s", request.method, request.path, str(e), exc_info=True)
+            response = jsonify({"error": "Internal Server Error"})
+            response.status_code = 500
+        return response
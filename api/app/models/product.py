@@ -3,12 +3,18 @@ from app.db import db
 
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    price = db.Column(db.Float, nullable=False, index=True)
     stock = db.Column(db.Integer, nullable=False)
     description = db.Column(db.String(255), nullable=True)
 
-    def to_dict(self):
+    # Keys of to_dict(), selectable with ?fields=
+    FIELDS = ("id", "name", "price", "stock", "description")
+
+    def to_dict(self, fields : tuple | None = None):
+        """Only reads ``fields`` when given, so it works on rows loaded with load_only()."""
+        if fields:
+            return {field: getattr(self, field) for field in fields}
         return {
             "id": self.id,
             "name": self.name,
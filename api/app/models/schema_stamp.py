@@ -0,0 +1,19 @@
+from app.db import db
+
+
+class SchemaStamp(db.Model):
+    """Schema and seed data the database was last prepared with, checked on startup."""
+    __tablename__ = "schema_stamp"
+
+    name = db.Column(db.String(50), primary_key=True)
+    schema_hash = db.Column(db.String(64), nullable=False)
+    seed_version = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "schema_hash": self.schema_hash,
+            "seed_version": self.seed_version,
+            "updated_at": self.updated_at
+        }
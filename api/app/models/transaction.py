@@ -1,18 +1,34 @@
 import stat
 from app.db import db
+from app.utils.status_names import status_names
 
 class Transaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     total = db.Column(db.Float, nullable=False)
-    transaction_date = db.Column(db.DateTime,  nullable=False)
+    transaction_date = db.Column(db.DateTime,  nullable=False, index=True)
     
-    status_id = db.Column(db.Integer, db.ForeignKey("status.id"), nullable=False)
+    status_id = db.Column(db.Integer, db.ForeignKey("status.id"), nullable=False, index=True)
     status = db.relationship("Status", back_populates="transactions")
 
-    def to_dict(self):
+    __table_args__ = (
+        # Covers the /transactions/stats aggregations: a date range is read from the index alone
+        db.Index("ix_transaction_date_totals", "transaction_date", "product_id", "user_id", "status_id", "quantity", "total"),
+    )
+
+    # Keys of to_dict(), selectable with ?fields=, and the column of the keys that are not one
+    FIELDS = ("id", "user_id", "product_id", "quantity", "total", "transaction_date", "status")
+    FIELD_COLUMNS = {"status": "status_id"}
+
+    def to_dict(self, fields : tuple | None = None):
+        """Only reads ``fields`` when given, so it works on rows loaded with load_only()."""
+        if fields:
+            return {
+                field: status_names.name_by_id(self.status_id) if field == "status" else getattr(self, field)
+                for field in fields
+            }
         return {
             "id": self.id,
             "user_id": self.user_id,
@@ -20,5 +36,5 @@ class Transaction(db.Model):
             "quantity": self.quantity,
             "total": self.total,
             "transaction_date": self.transaction_date,
-            "status": self.status.name if self.status else None
+            "status": status_names.name_by_id(self.status_id)
         }
\ No newline at end of file
@@ -3,11 +3,17 @@ from app.db import db
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), nullable=True)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    email = db.Column(db.String(100), nullable=True, index=True)
     document = db.Column(db.String(100), unique=True, nullable=False)
 
-    def to_dict(self):
+    # Keys of to_dict(), selectable with ?fields=
+    FIELDS = ("id", "name", "email", "document")
+
+    def to_dict(self, fields : tuple | None = None):
+        """Only reads ``fields`` when given, so it works on rows loaded with load_only()."""
+        if fields:
+            return {field: getattr(self, field) for field in fields}
         return {
             "id": self.id,
             "name": self.name,
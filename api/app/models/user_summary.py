@@ -0,0 +1,26 @@
+from app.db import db
+
+
+class UserSummary(db.Model):
+    """
+    Totals of a user's transactions in one status, kept up to date by TransactionRepository in
+    the same DB transaction as the write. Rows are removed when their count drops to zero.
+    """
+    __tablename__ = "user_summary"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    status_id = db.Column(db.Integer, db.ForeignKey("status.id"), primary_key=True)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    total_spent = db.Column(db.Float, nullable=False, default=0)
+    last_transaction_date = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "status_id": self.status_id,
+            "transaction_count": self.transaction_count,
+            "quantity": self.quantity,
+            "total_spent": self.total_spent,
+            "last_transaction_date": self.last_transaction_date
+        }
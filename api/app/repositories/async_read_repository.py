@@ -0,0 +1,102 @@
+import logging
+
+from sqlalchemy import select
+
+from app.models.status import Status
+from app.utils.fields import only_fields, pick
+from app.utils.pagination import split_page
+from app.utils.status_names import status_names
+
+
+class AsyncReadRepository:
+    """
+    Read queries of the ASGI mode (app.asgi), on an AsyncSession.
+
+    Work on the same models and return the same dicts as the sync repositories. Errors are logged
+    and returned as None, the caller answers 500.
+    """
+
+    @staticmethod
+    async def _resolve_statuses(session, rows, fields : tuple | None = None):
+        """
+        Reloads the status names through the async session when a row has a status unknown to the
+        cache (created by another worker), at most once every refresh interval. to_dict() then
+        only reads the cache, the sync loader cannot run on the event loop.
+        """
+        if fields and "status" not in fields:
+            return
+        if any(status_names.name_by_id(row.status_id) is None for row in rows if hasattr(row, "status_id")) \
+                and status_names.refresh_due():
+            result = await session.execute(select(Status.id, Status.name))
+            status_names.load(result.all())
+
+    @staticmethod
+    async def get_all(session, model, fields : tuple | None = None):
+        try:
+            rows = (await session.execute(only_fields(select(model), model, fields))).scalars().all()
+            await AsyncReadRepository._resolve_statuses(session, rows, fields)
+            return [row.to_dict(fields) for row in rows]
+        except Exception as e:
+            logging.error("Error fetching %s: %s", model.__tablename__, str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    async def get_page(session, model, limit : int, after : int | None = None, fields : tuple | None = None):
+        try:
+            query = only_fields(select(model), model, fields)
+            if after is not None:
+                query = query.where(model.id > after)
+
+            result = await session.execute(query.order_by(model.id).limit(limit + 1))
+            rows, next_cursor = split_page(result.scalars().all(), model.id, limit)
+            await AsyncReadRepository._resolve_statuses(session, rows, fields)
+            return {"items": [row.to_dict(fields) for row in rows], "next_cursor": next_cursor, "limit": limit}
+        except Exception as e:
+            logging.error("Error fetching %s page: %s", model.__tablename__, str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    async def iter_all(session, model, batch_size : int = 1000, fields : tuple | None = None):
+        try:
+            query = only_fields(select(model), model, fields)
+            result = await session.stream(query.order_by(model.id).execution_options(yield_per=batch_size))
+            async for row in result.scalars():
+                await AsyncReadRepository._resolve_statuses(session, (row,), fields)
+                yield row.to_dict(fields)
+        except Exception as e:
+            logging.error("Error streaming %s: %s", model.__tablename__, str(e), exc_info=True)
+            raise
+
+    @staticmethod
+    async def get_by_id(session, model, row_id : int, cache=None, fields : tuple | None = None):
+        """Uses the EntityCache of the sync repository when given, so both modes share it."""
+        try:
+            if cache is not None:
+                cached = cache.get(row_id)
+                if cached is not None:
+                    return pick(cached, fields)
+                token = cache.load_token()
+
+            row = await session.get(model, row_id)
+            if row is None:
+                return None
+
+            await AsyncReadRepository._resolve_statuses(session, (row,))
+
+            result = row.to_dict()
+            if cache is not None:
+                cache.set(row_id, result, token)
+            return pick(result, fields)
+        except Exception as e:
+            logging.error("Error fetching %s by ID: %s", model.__tablename__, str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    async def filter_by(session, model, fields : tuple | None = None, **filters):
+        try:
+            rows = (await session.execute(only_fields(select(model), model, fields).filter_by(**filters))).scalars().all()
+            await AsyncReadRepository._resolve_statuses(session, rows, fields)
+            return [row.to_dict(fields) for row in rows]
+        except Exception as e:
+            logging.error("Error filtering %s: %s", model.__tablename__, str(e), exc_info=True)
+            return None
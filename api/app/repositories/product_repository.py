@@ -1,43 +1,100 @@
 import logging
 
-from flask import current_app
+from sqlalchemy import bindparam
 
-from app.db import db
+from app.db import db, on_commit
 from app.models.product import Product
+from app.repositories.table_version_repository import TableVersionRepository
+from app.utils.cache import EntityCache
+from app.utils.fields import only_fields, pick
+from app.utils.pagination import keyset_page
+from app.utils.prefix_index import PrefixIndex
+from app.utils.search import search_page
 
 
 class ProductRepository:
+    cache = EntityCache("product")
+    names = PrefixIndex("product")
+
+    @staticmethod
+    def load_name_index():
+        """(Re)builds the autocomplete index from the table."""
+        try:
+            version = TableVersionRepository.get_foreign_version("product")
+            rows = db.session.query(Product.id, Product.name).yield_per(10000)
+            ProductRepository.names.load(rows, version)
+            logging.info("Product name index loaded with %d names", ProductRepository.names.stats()["size"])
+        except Exception as e:
+            ProductRepository.names.refresh_failed()
+            logging.error("Error loading product name index: %s", str(e), exc_info=True)
+
     @staticmethod
     def create(data : dict[str, str]):
         try:
-            with current_app.app_context():
-                new_product = Product(name=data["name"], price=data["price"], stock=data["stock"],
-                                      description=data["description"])
-                db.session.add(new_product)
-                db.session.commit()
-                return new_product.to_dict()
+            new_product = Product(name=data["name"], price=data["price"], stock=data["stock"],
+                                  description=data["description"])
+            db.session.add(new_product)
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.names.put, new_product.id, new_product.name)
+            return new_product.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error in create_product: %s", str(e), exc_info=True)
             return {"error": "Internal Server Error"}, 500
     
     @staticmethod
-    def get_all():
+    def get_all(fields : tuple | None = None):
         try:
-            with current_app.app_context():
-                products = Product.query.all()
-                logging.info("Fetched %d products", len(products))
-                return [product.to_dict() for product in products]
+            products = only_fields(Product.query, Product, fields).all()
+            return [product.to_dict(fields) for product in products]
         except Exception as e:
             logging.error("Error fetching products: %s", str(e), exc_info=True)
             return {"error": "Internal Server Error"}, 500
 
     @staticmethod
-    def get_by_id(product_id : int):
+    def get_page(limit : int, after : int | None = None, fields : tuple | None = None):
+        try:
+            products, next_cursor = keyset_page(only_fields(Product.query, Product, fields), Product.id, limit, after)
+            return {"items": [product.to_dict(fields) for product in products], "next_cursor": next_cursor, "limit": limit}
+        except Exception as e:
+            logging.error("Error fetching products page: %s", str(e), exc_info=True)
+            return {"error": "Internal Server Error"}, 500
+
+    @staticmethod
+    def search(search : str, limit : int, offset : int = 0):
+        try:
+            products, next_offset = search_page(Product, search, limit, offset)
+            return {"items": [product.to_dict() for product in products], "next_offset": next_offset, "limit": limit}
+        except Exception as e:
+            logging.error("Error searching products: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def iter_all(batch_size : int = 1000, fields : tuple | None = None):
+        try:
+            for product in only_fields(Product.query, Product, fields).order_by(Product.id).yield_per(batch_size):
+                yield product.to_dict(fields)
+        except Exception as e:
+            logging.error("Error streaming products: %s", str(e), exc_info=True)
+            raise
+
+    @staticmethod
+    def get_by_id(product_id : int, fields : tuple | None = None):
+        """The whole entity is read and cached, ``fields`` only narrows the returned dict."""
         try:
-            with current_app.app_context():
-                product : Product = Product.query.get(product_id)
-                return product.to_dict() if product else None
+            cached = ProductRepository.cache.get(product_id)
+            if cached is not None:
+                return pick(cached, fields)
+
+            token = ProductRepository.cache.load_token()
+            product : Product = Product.query.get(product_id)
+            if not product:
+                return None
+
+            result = product.to_dict()
+            ProductRepository.cache.set(product_id, result, token)
+            return pick(result, fields)
         except Exception as e:
             logging.error("Error fetching product by ID: %s", str(e), exc_info=True)
             return None
@@ -45,9 +102,8 @@ class ProductRepository:
     @staticmethod
     def get_by_name(name : str):
         try:
-            with current_app.app_context():
-                product : Product = Product.query.filter_by(name=name).first()
-                return product.to_dict() if product else None
+            product : Product = Product.query.filter_by(name=name).first()
+            return product.to_dict() if product else None
         except Exception as e:
             logging.error("Error fetching product by name: %s", str(e), exc_info=True)
             return None
@@ -55,9 +111,8 @@ class ProductRepository:
     @staticmethod
     def get_all_by_price(price : float):
         try:
-            with current_app.app_context():
-                products = Product.query.filter(Product.price == price).all()
-                return [product.to_dict() for product in products]
+            products = Product.query.filter(Product.price == price).all()
+            return [product.to_dict() for product in products]
         except Exception as e:
             logging.error("Error fetching products by price: %s", str(e), exc_info=True)
             return None
@@ -65,14 +120,15 @@ class ProductRepository:
     @staticmethod
     def update_description(product_id :int , description : str):
         try:
-            with current_app.app_context():
-                product : Product = Product.query.get(product_id)
-                if not product:
-                    return None
+            product : Product = Product.query.get(product_id)
+            if not product:
+                return None
 
-                product.description = description
-                db.session.commit()
-                return product.to_dict()
+            product.description = description
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.cache.invalidate, product.id)
+            return product.to_dict()
         except Exception as e:
             logging.error("Error in update_description: %s", str(e), exc_info=True)
             return None
@@ -80,17 +136,19 @@ class ProductRepository:
     @staticmethod
     def update_by_id(product_id : int, data : dict[str, str]):
         try:
-            with current_app.app_context():
-                product : Product = Product.query.get(product_id)
-                if not product:
-                    return None
+            product : Product = Product.query.get(product_id)
+            if not product:
+                return None
 
-                product.name = data["name"]
-                product.price = data["price"]
-                product.stock = data["stock"]
-                product.description = data["description"]
-                db.session.commit()
-                return product.to_dict()
+            product.name = data["name"]
+            product.price = data["price"]
+            product.stock = data["stock"]
+            product.description = data["description"]
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.cache.invalidate, product.id)
+            on_commit(ProductRepository.names.put, product.id, product.name)
+            return product.to_dict()
         except Exception as e:
             logging.error("Error in update_product: %s", str(e), exc_info=True)
             return None
@@ -98,14 +156,16 @@ class ProductRepository:
     @staticmethod
     def delete_by_id(product_id : int):
         try:
-            with current_app.app_context():
-                product : Product = Product.query.get(product_id)
-                if not product:
-                    return None
+            product : Product = Product.query.get(product_id)
+            if not product:
+                return None
 
-                db.session.delete(product)
-                db.session.commit()
-                return product.to_dict()
+            db.session.delete(product)
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.cache.invalidate, product.id)
+            on_commit(ProductRepository.names.remove, product.id)
+            return product.to_dict()
         except Exception as e:
             logging.error("Error in delete_product: %s", str(e), exc_info=True)
             return None
@@ -113,14 +173,16 @@ class ProductRepository:
     @staticmethod
     def delete_by_name(name : str):
         try:
-            with current_app.app_context():
-                product : Product = Product.query.filter_by(name=name).first()
-                if not product:
-                    return None
+            product : Product = Product.query.filter_by(name=name).first()
+            if not product:
+                return None
 
-                db.session.delete(product)
-                db.session.commit()
-                return product.to_dict()
+            db.session.delete(product)
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.cache.invalidate, product.id)
+            on_commit(ProductRepository.names.remove, product.id)
+            return product.to_dict()
         except Exception as e:
             logging.error("Error in delete_product: %s", str(e), exc_info=True)
             return None
@@ -128,12 +190,13 @@ class ProductRepository:
     @staticmethod
     def create_product(data : dict[str, str]):
         try:
-            with current_app.app_context():
-                new_product = Product(name=data["name"], price=data["price"], stock=data["stock"],
-                                      description=data["description"])
-                db.session.add(new_product)
-                db.session.commit()
-                return new_product.to_dict()
+            new_product = Product(name=data["name"], price=data["price"], stock=data["stock"],
+                                  description=data["description"])
+            db.session.add(new_product)
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.names.put, new_product.id, new_product.name)
+            return new_product.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error in create_product: %s", str(e), exc_info=True)
@@ -142,14 +205,15 @@ class ProductRepository:
     @staticmethod
     def update_stock(product_id : int , quantity : int):
         try:
-            with current_app.app_context():
-                product : Product = Product.query.get(product_id)
-                if not product:
-                    return None
+            product : Product = Product.query.get(product_id)
+            if not product:
+                return None
 
-                product.stock = quantity
-                db.session.commit()
-                return product.to_dict()
+            product.stock = quantity
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.cache.invalidate, product.id)
+            return product.to_dict()
         except Exception as e:
             logging.error("Error in update_stock: %s", str(e), exc_info=True)
             return None
@@ -157,14 +221,16 @@ class ProductRepository:
     @staticmethod
     def update_name(product_id: int , name : str):
         try:
-            with current_app.app_context():
-                product : Product = Product.query.get(product_id)
-                if not product:
-                    return None
+            product : Product = Product.query.get(product_id)
+            if not product:
+                return None
 
-                product.name = name
-                db.session.commit()
-                return product.to_dict()
+            product.name = name
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.cache.invalidate, product.id)
+            on_commit(ProductRepository.names.put, product.id, product.name)
+            return product.to_dict()
         except Exception as e:
             logging.error("Error in update_name: %s", str(e), exc_info=True)
             return None
@@ -172,14 +238,63 @@ class ProductRepository:
     @staticmethod
     def update_price(product_id: int, price : float):
         try:
-            with current_app.app_context():
-                product : Product = Product.query.get(product_id)
-                if not product:
-                    return None
+            product : Product = Product.query.get(product_id)
+            if not product:
+                return None
 
-                product.price = price
-                db.session.commit()
-                return product.to_dict()
+            product.price = price
+            TableVersionRepository.bump("product")
+            db.session.flush()
+            on_commit(ProductRepository.cache.invalidate, product.id)
+            return product.to_dict()
         except Exception as e:
             logging.error("Error in update_price: %s", str(e), exc_info=True)
             return None
+
+    @staticmethod
+    def bulk_import(rows : list[dict], upsert : bool = False):
+        """
+        Writes one chunk of validated products in a single DB transaction.
+
+        With ``upsert`` set, rows whose name already exists update every product with that name
+        instead of inserting a new one (the last row wins when a name repeats inside the chunk).
+
+        Returns:
+            tuple: number of inserted and updated rows, or None when the chunk was rolled back.
+        """
+        table = Product.__table__
+        try:
+            to_update = []
+            if upsert:
+                rows = list({row["name"]: row for row in rows}.values())
+                names = [row["name"] for row in rows]
+                existing = {name for (name,) in db.session.query(Product.name).filter(Product.name.in_(names))}
+                to_update = [row for row in rows if row["name"] in existing]
+                rows = [row for row in rows if row["name"] not in existing]
+
+            if to_update:
+                db.session.execute(
+                    table.update()
+                    .where(table.c.name == bindparam("match_name"))
+                    .values(price=bindparam("price"), stock=bindparam("stock"), description=bindparam("description")),
+                    [{**row, "match_name": row["name"]} for row in to_update]
+                )
+
+            inserted = []
+            if rows:
+                db.session.execute(table.insert(), rows)
+                # Also returns older products with the same names, put() is idempotent for them
+                inserted = db.session.query(Product.id, Product.name).filter(Product.name.in_([row["name"] for row in rows])).all()
+
+            TableVersionRepository.bump("product")
+            # Each chunk is its own transaction, committed now instead of at the end of the request
+            db.session.commit()
+            for product_id, name in inserted:
+                ProductRepository.names.put(product_id, name)
+            if to_update:
+                ProductRepository.cache.clear()
+            return len(rows), len(to_update)
+        except Exception as e:
+            db.session.rollback()
+            logging.error("Error in bulk_import: %s", str(e), exc_info=True)
+            return None
@@ -1,15 +1,18 @@
 import logging
-from flask import current_app
-from app.db import db
+
+from app.db import db, on_commit
 from app.models.status import Status
+from app.utils.status_names import status_names
 
 class StatusRepository:
+    # Shared with Transaction.to_dict(), which reads it without going through the repository
+    names = status_names
+
     @staticmethod
     def get_all():
         try:
-            with current_app.app_context():
-                statuses = Status.query.all()
-                return [status.to_dict() for status in statuses]
+            statuses = Status.query.all()
+            return [status.to_dict() for status in statuses]
         except Exception as e:
             logging.error("Error fetching statuses: %s", str(e), exc_info=True)
             return []
@@ -17,9 +20,8 @@ class StatusRepository:
     @staticmethod
     def get_by_id(status_id: int):
         try:
-            with current_app.app_context():
-                status = Status.query.get(status_id)
-                return status.to_dict() if status else None
+            status = Status.query.get(status_id)
+            return status.to_dict() if status else None
         except Exception as e:
             logging.error("Error fetching status by ID: %s", str(e), exc_info=True)
             return None
@@ -27,10 +29,10 @@ class StatusRepository:
     @staticmethod
     def create_status(status: Status):
         try:
-            with current_app.app_context():
-                db.session.add(status)
-                db.session.commit()
-                return status.to_dict()
+            db.session.add(status)
+            db.session.flush()
+            on_commit(StatusRepository.names.add, status.id, status.name)
+            return status.to_dict()
         except Exception as e:
             logging.error("Error creating status: %s", str(e), exc_info=True)
             db.session.rollback()  
@@ -39,8 +41,39 @@ class StatusRepository:
     @staticmethod
     def is_table_empty():
         try:
-            with current_app.app_context():
-                return Status.query.count() == 0
+            return Status.query.count() == 0
         except Exception as e:
             logging.error("Error checking if Status table is empty: %s", str(e), exc_info=True)
-            return True  
\ No newline at end of file
+            return True  
+
+    @staticmethod
+    def load_cache():
+        try:
+            statuses = Status.query.all()
+            StatusRepository.names.load((status.id, status.name) for status in statuses)
+            logging.debug("Status cache loaded with %d statuses", len(statuses))
+        except Exception as e:
+            logging.error("Error loading status cache: %s", str(e), exc_info=True)
+
+    @staticmethod
+    def _refresh_on_miss():
+        # Another worker may have created it after our cache was loaded; an unknown status sent
+        # by a client must not cost a query on every request, so this reloads at most once a while
+        if StatusRepository.names.refresh_due():
+            StatusRepository.load_cache()
+
+    @staticmethod
+    def get_id_by_name(name: str):
+        status_id = StatusRepository.names.id_by_name(name)
+        if status_id is None and name is not None:
+            StatusRepository._refresh_on_miss()
+            status_id = StatusRepository.names.id_by_name(name)
+        return status_id
+
+    @staticmethod
+    def get_name_by_id(status_id: int):
+        name = StatusRepository.names.name_by_id(status_id)
+        if name is None and status_id is not None:
+            StatusRepository._refresh_on_miss()
+            name = StatusRepository.names.name_by_id(status_id)
+        return name
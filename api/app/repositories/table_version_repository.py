@@ -0,0 +1,70 @@
+import logging
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import update
+
+from app.db import db, on_commit
+from app.models.table_version import TableVersion
+
+
+class TableVersionRepository:
+    TABLES = ("user", "product", "transaction")
+
+    # names -> (expires at, versions), keeps conditional GETs of hot rows off the database
+    _cache = {}
+    # name -> versions committed by this process, to tell its own writes from the other processes'
+    _local_bumps = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def bump(*names : str):
+        """
+        Increments the version of the given tables.
+
+        Must be called inside the writer's transaction, so the new version becomes visible
+        together with the data it describes.
+        """
+        db.session.execute(
+            update(TableVersion)
+            .where(TableVersion.name.in_(names))
+            .values(version=TableVersion.version + 1)
+        )
+        on_commit(TableVersionRepository._committed, names)
+
+    @staticmethod
+    def _committed(names : tuple[str, ...]):
+        with TableVersionRepository._lock:
+            TableVersionRepository._cache.clear()
+            for name in names:
+                TableVersionRepository._local_bumps[name] = TableVersionRepository._local_bumps.get(name, 0) + 1
+
+    @staticmethod
+    def get_foreign_version(name : str):
+        """
+        The version of ``name`` minus the bumps this process committed: it only moves when another
+        process writes to the table. None when the version could not be read.
+        """
+        local = TableVersionRepository._local_bumps.get(name, 0)
+        versions = TableVersionRepository.get_versions((name,))
+        return versions[0] - local if versions is not None else None
+
+    @staticmethod
+    def get_versions(names : tuple[str, ...]):
+        now = time.monotonic()
+        cached = TableVersionRepository._cache.get(names)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        try:
+            rows = dict(db.session.query(TableVersion.name, TableVersion.version).filter(TableVersion.name.in_(names)))
+            versions = tuple(rows.get(name, 0) for name in names)
+
+            ttl = current_app.config["TABLE_VERSION_CACHE_TTL"]
+            if ttl > 0:
+                TableVersionRepository._cache[names] = (now + ttl, versions)
+            return versions
+        except Exception as e:
+            logging.error("Error fetching table versions: %s", str(e), exc_info=True)
+            return None
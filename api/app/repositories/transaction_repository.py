@@ -1,118 +1,295 @@
 import logging
+from datetime import datetime
 
-from flask import current_app
+from sqlalchemy import func, update
 
-from app.db import db
+from app.db import db, on_commit
 from app.models.transaction import Transaction
+from app.repositories.table_version_repository import TableVersionRepository
+from app.utils.fields import only_fields
+from app.utils.pagination import keyset_page
 from app.models.product import Product
 from app.repositories.product_repository import ProductRepository
+from app.repositories.status_repository import StatusRepository
+from app.repositories.user_summary_repository import UserSummaryRepository
+
+# Key of each /transactions/stats grouping, named as in the response
+STATS_GROUPS = {
+    "product": ("product_id", Transaction.product_id),
+    "user": ("user_id", Transaction.user_id),
+    "status": ("status", Transaction.status_id),
+    "day": ("day", func.date(Transaction.transaction_date)),
+}
+
+# Transactions in these statuses hold no stock: moving into one gives the quantity back
+RELEASING_STATUSES = frozenset(("canceled", "rejected"))
 
 class TransactionRepository:
     @staticmethod
-    def get_by_id(transaction_id : int):
+    def _to_dict(transaction : Transaction, fields : tuple | None = None):
+        if (not fields or "status" in fields) and StatusRepository.names.name_by_id(transaction.status_id) is None:
+            # Created by another worker after the cache was loaded, reloaded at most once a while
+            StatusRepository.get_name_by_id(transaction.status_id)
+        return transaction.to_dict(fields)
+
+    @staticmethod
+    def get_by_id(transaction_id : int, fields : tuple | None = None):
         try:
-            with current_app.app_context():
-                transaction : Transaction = Transaction.query.get(transaction_id)
-                return transaction.to_dict() if transaction else None
+            transaction : Transaction = only_fields(Transaction.query, Transaction, fields).get(transaction_id)
+            return TransactionRepository._to_dict(transaction, fields) if transaction else None
         except Exception as e:
             logging.error("Error fetching transaction by ID: %s", str(e), exc_info=True)
             return None
         
     @staticmethod
-    def get_by_user_id(user_id : int):
+    def get_by_user_id(user_id : int, fields : tuple | None = None):
         try:
-            with current_app.app_context():
-                transactions = Transaction.query.filter_by(user_id=user_id).all()
-                return [transaction.to_dict() for transaction in transactions]
+            transactions = only_fields(Transaction.query, Transaction, fields).filter_by(user_id=user_id).all()
+            return [TransactionRepository._to_dict(transaction, fields) for transaction in transactions]
         except Exception as e:
             logging.error("Error fetching transactions by user ID: %s", str(e), exc_info=True)
             return None
     
     @staticmethod
-    def get_all():
+    def get_all(fields : tuple | None = None):
         try:
-            with current_app.app_context():
-                transactions = Transaction.query.all()
-                return [transaction.to_dict() for transaction in transactions]
+            transactions = only_fields(Transaction.query, Transaction, fields).all()
+            return [TransactionRepository._to_dict(transaction, fields) for transaction in transactions]
         except Exception as e:
             logging.error("Error fetching transactions: %s", str(e), exc_info=True)
             return None
     
+    @staticmethod
+    def get_page(limit : int, after : int | None = None, fields : tuple | None = None):
+        try:
+            transactions, next_cursor = keyset_page(only_fields(Transaction.query, Transaction, fields), Transaction.id, limit, after)
+            return {"items": [TransactionRepository._to_dict(transaction, fields) for transaction in transactions], "next_cursor": next_cursor, "limit": limit}
+        except Exception as e:
+            logging.error("Error fetching transactions page: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def iter_all(batch_size : int = 1000, fields : tuple | None = None):
+        try:
+            for transaction in only_fields(Transaction.query, Transaction, fields).order_by(Transaction.id).yield_per(batch_size):
+                yield TransactionRepository._to_dict(transaction, fields)
+        except Exception as e:
+            logging.error("Error streaming transactions: %s", str(e), exc_info=True)
+            raise
+
+    @staticmethod
+    def get_stats(group_by : str | None = None, start : datetime | None = None, end : datetime | None = None):
+        """
+        Count, quantity, total and average total of the transactions between ``start`` (inclusive)
+        and ``end`` (exclusive), computed by the database, overall or per ``group_by`` key.
+
+        Every column read is in ix_transaction_date_totals, so the table itself is never touched.
+        """
+        try:
+            columns = [
+                func.count().label("count"),
+                func.coalesce(func.sum(Transaction.quantity), 0).label("quantity"),
+                func.coalesce(func.sum(Transaction.total), 0).label("total"),
+                func.avg(Transaction.total).label("average_total"),
+            ]
+            key_name, key_column = STATS_GROUPS[group_by] if group_by else (None, None)
+            if key_column is not None:
+                columns.insert(0, key_column.label("key"))
+
+            query = db.session.query(*columns)
+            if start is not None:
+                query = query.filter(Transaction.transaction_date >= start)
+            if end is not None:
+                query = query.filter(Transaction.transaction_date < end)
+
+            if key_column is None:
+                return TransactionRepository._stats_row(query.one())
+
+            rows = query.group_by(key_column).order_by(key_column).all()
+            items = []
+            for row in rows:
+                key = row.key
+                if group_by == "status":
+                    key = StatusRepository.get_name_by_id(key)
+                elif group_by == "day" and not isinstance(key, str):
+                    key = key.isoformat()
+                items.append({key_name: key, **TransactionRepository._stats_row(row)})
+            return items
+        except Exception as e:
+            logging.error("Error fetching transaction stats: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def _stats_row(row):
+        return {
+            "count": row.count,
+            "quantity": int(row.quantity),
+            "total": round(float(row.total), 2),
+            "average_total": round(float(row.average_total), 2) if row.average_total is not None else None,
+        }
+
+    @staticmethod
+    def _stock_held(transaction : Transaction):
+        """The (product_id, quantity) of stock ``transaction`` holds, None in a releasing status."""
+        if StatusRepository.get_name_by_id(transaction.status_id) in RELEASING_STATUSES:
+            return None
+        return (transaction.product_id, transaction.quantity)
+
+    @staticmethod
+    def _move_stock(before : tuple | None, after : tuple | None):
+        """
+        Moves the stock held by a transaction from ``before`` to ``after``, both (product_id, quantity)
+        or None, inside the writer's DB transaction.
+
+        Stock is only taken by a conditional UPDATE (``stock >= quantity``), so concurrent requests
+        can never oversell a product.
+
+        Returns:
+            list: the ids of the products whose stock changed, or None when a product does not
+            exist or has not enough stock; the caller must then roll back.
+        """
+        deltas = {}
+        if before is not None:
+            deltas[before[0]] = deltas.get(before[0], 0) - before[1]
+        if after is not None:
+            deltas[after[0]] = deltas.get(after[0], 0) + after[1]
+
+        changed = []
+        for product_id, delta in deltas.items():
+            if not delta:
+                continue
+
+            statement = update(Product).where(Product.id == product_id).values(stock=Product.stock - delta)
+            if delta > 0:
+                statement = statement.where(Product.stock >= delta)
+            if not db.session.execute(statement).rowcount and delta > 0:
+                logging.warning("Stock unavailable for product_id: %s", product_id)
+                return None
+            changed.append(product_id)
+        return changed
+
+    @staticmethod
+    def _stock_moved(products : list):
+        """Bumps the versions and drops the cached products after a write that moved ``products`` stock."""
+        if products:
+            TableVersionRepository.bump("transaction", "product")
+        else:
+            TableVersionRepository.bump("transaction")
+        for product_id in products:
+            on_commit(ProductRepository.cache.invalidate, product_id)
+
     @staticmethod
     def create_transaction(transaction : Transaction):
+        """
+        Reserves the stock and inserts the transaction in a single DB transaction.
+
+        Returns None when the product does not exist or has not enough stock.
+        """
         try:
-            with current_app.app_context():
-                product_price = ProductRepository.get_by_id(transaction.product_id)["price"]
-                
-                transaction.transaction_date = db.func.now()
-                transaction.total = product_price * transaction.quantity
+            products = TransactionRepository._move_stock(None, TransactionRepository._stock_held(transaction))
+            if products is None:
+                db.session.rollback()
+                return None
 
-                db.session.add(transaction)
-                db.session.commit()
-                return transaction.to_dict()
+            product_price = db.session.query(Product.price).filter(Product.id == transaction.product_id).scalar()
+
+            transaction.transaction_date = datetime.utcnow()
+            transaction.total = product_price * transaction.quantity
+
+            db.session.add(transaction)
+            db.session.flush()
+            result = transaction.to_dict()
+            UserSummaryRepository.add(UserSummaryRepository.snapshot(transaction))
+            TransactionRepository._stock_moved(products)
+            db.session.flush()
+            return result
         except Exception as e:
+            db.session.rollback()
             logging.error("Error creating transaction: %s", str(e), exc_info=True)
             return None
         
     @staticmethod
     def update_by_id(transaction_id : int, data : dict[str, str]):
+        """
+        The total is recomputed from the product price. Returns {"error": ...} without changing
+        anything when the new product has not enough stock.
+        """
         try:
-            with current_app.app_context():
-                transaction : Transaction = Transaction.query.get(transaction_id)
-                if not transaction:
-                    return None
+            transaction : Transaction = Transaction.query.get(transaction_id)
+            if not transaction:
+                return None
                 
-                transaction.user_id = data["user_id"]
-                transaction.product_id = data["product_id"]
-                transaction.quantity = data["quantity"]
-                transaction.total = data["total"]
-                db.session.commit()
-                return transaction.to_dict()
+            previous = UserSummaryRepository.snapshot(transaction)
+            held = TransactionRepository._stock_held(transaction)
+            transaction.user_id = data["user_id"]
+            transaction.product_id = data["product_id"]
+            transaction.quantity = data["quantity"]
+
+            products = TransactionRepository._move_stock(held, TransactionRepository._stock_held(transaction))
+            if products is None:
+                db.session.rollback()
+                return {"error": "Stock unavailable"}
+
+            # Priced like create_transaction: the client's total is never trusted
+            product_price = db.session.query(Product.price).filter(Product.id == transaction.product_id).scalar()
+            if product_price is None:
+                db.session.rollback()
+                return None
+            transaction.total = product_price * transaction.quantity
+
+            TransactionRepository._stock_moved(products)
+            db.session.flush()
+            UserSummaryRepository.remove(previous)
+            UserSummaryRepository.add(UserSummaryRepository.snapshot(transaction))
+            return transaction.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error updating transaction: %s", str(e), exc_info=True)
             return None
         
-    @staticmethod
-    def check_stock(product_id : int, quantity : int):
-        try:
-            with current_app.app_context():
-                product : Product = Product.query.get(product_id)
-                if not product:
-                    return False
-                
-                return product.stock >= quantity
-        except Exception as e:
-            logging.error("Error checking stock: %s", str(e), exc_info=True)
-            return False
-        
     @staticmethod
     def delete_by_id(transaction_id : int):
         try:
-            with current_app.app_context():
-                transaction : Transaction = Transaction.query.get(transaction_id)
-                if not transaction:
-                    return None
+            transaction : Transaction = Transaction.query.get(transaction_id)
+            if not transaction:
+                return None
                 
-                db.session.delete(transaction)
-                db.session.commit()
-                return transaction.to_dict()
+            previous = UserSummaryRepository.snapshot(transaction)
+            products = TransactionRepository._move_stock(TransactionRepository._stock_held(transaction), None)
+            db.session.delete(transaction)
+            TransactionRepository._stock_moved(products)
+            db.session.flush()
+            UserSummaryRepository.remove(previous)
+            return transaction.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error deleting transaction: %s", str(e), exc_info=True)
             return None
     
     @staticmethod
-    def update_transaction_status(transaction_id : int, status : str):
+    def update_transaction_status(transaction_id : int, status_id : int):
+        """
+        Moving into a releasing status (canceled, rejected) gives the stock back, moving out of one
+        reserves it again. Returns {"error": ...} without changing anything when the stock is not enough.
+        """
         try:
-            with current_app.app_context():
-                transaction : Transaction = Transaction.query.get(transaction_id)
-                if not transaction:
-                    return None
+            transaction : Transaction = Transaction.query.get(transaction_id)
+            if not transaction:
+                return None
                 
-                transaction.status = status
-                db.session.commit()
-                return transaction.to_dict()
+            previous = UserSummaryRepository.snapshot(transaction)
+            held = TransactionRepository._stock_held(transaction)
+            transaction.status_id = status_id
+
+            products = TransactionRepository._move_stock(held, TransactionRepository._stock_held(transaction))
+            if products is None:
+                db.session.rollback()
+                return {"error": "Stock unavailable"}
+            TransactionRepository._stock_moved(products)
+            db.session.flush()
+            UserSummaryRepository.remove(previous)
+            UserSummaryRepository.add(UserSummaryRepository.snapshot(transaction))
+            return transaction.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error updating transaction status: %s", str(e), exc_info=True)
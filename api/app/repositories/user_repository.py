@@ -1,39 +1,96 @@
 import logging
 
-from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 
-from app.db import db
+from app.db import db, on_commit
 from app.models.user import User
+from app.repositories.table_version_repository import TableVersionRepository
+from app.repositories.user_summary_repository import UserSummaryRepository
+from app.utils.cache import EntityCache
+from app.utils.fields import only_fields, pick
+from app.utils.pagination import keyset_page
+from app.utils.prefix_index import PrefixIndex
+from app.utils.search import search_page
 
 
 class UserRepository:
+    cache = EntityCache("user")
+    names = PrefixIndex("user")
+
+    @staticmethod
+    def load_name_index():
+        """(Re)builds the autocomplete index from the table."""
+        try:
+            version = TableVersionRepository.get_foreign_version("user")
+            rows = db.session.query(User.id, User.name).yield_per(10000)
+            UserRepository.names.load(rows, version)
+            logging.info("User name index loaded with %d names", UserRepository.names.stats()["size"])
+        except Exception as e:
+            UserRepository.names.refresh_failed()
+            logging.error("Error loading user name index: %s", str(e), exc_info=True)
+
     @staticmethod
     def get_by_document(document : str):
         try:
-            with current_app.app_context():
-                user : User = User.query.filter_by(document=document).first()
-                return user.to_dict() if user else None
+            user : User = User.query.filter_by(document=document).first()
+            return user.to_dict() if user else None
         except Exception as e:
             logging.error("Error fetching user by document: %s", str(e), exc_info=True)
             return None
 
     @staticmethod
-    def get_all():
+    def get_all(fields : tuple | None = None):
         try:
-            with current_app.app_context():
-                users = User.query.all()
-                logging.info("Fetched %d users", len(users))
-                return [user.to_dict() for user in users]
+            users = only_fields(User.query, User, fields).all()
+            return [user.to_dict(fields) for user in users]
         except Exception as e:
             logging.error("Error fetching users: %s", str(e), exc_info=True)
             return {"error": "Internal Server Error"}, 500
 
     @staticmethod
-    def get_by_id(user_id : int):
+    def get_page(limit : int, after : int | None = None, fields : tuple | None = None):
+        try:
+            users, next_cursor = keyset_page(only_fields(User.query, User, fields), User.id, limit, after)
+            return {"items": [user.to_dict(fields) for user in users], "next_cursor": next_cursor, "limit": limit}
+        except Exception as e:
+            logging.error("Error fetching users page: %s", str(e), exc_info=True)
+            return {"error": "Internal Server Error"}, 500
+
+    @staticmethod
+    def search(search : str, limit : int, offset : int = 0):
         try:
-            with current_app.app_context():
-                user : User = User.query.get(user_id)
-                return user.to_dict() if user else None
+            users, next_offset = search_page(User, search, limit, offset)
+            return {"items": [user.to_dict() for user in users], "next_offset": next_offset, "limit": limit}
+        except Exception as e:
+            logging.error("Error searching users: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def iter_all(batch_size : int = 1000, fields : tuple | None = None):
+        try:
+            for user in only_fields(User.query, User, fields).order_by(User.id).yield_per(batch_size):
+                yield user.to_dict(fields)
+        except Exception as e:
+            logging.error("Error streaming users: %s", str(e), exc_info=True)
+            raise
+
+    @staticmethod
+    def get_by_id(user_id : int, fields : tuple | None = None):
+        """The whole entity is read and cached, ``fields`` only narrows the returned dict."""
+        try:
+            cached = UserRepository.cache.get(user_id)
+            if cached is not None:
+                return pick(cached, fields)
+
+            token = UserRepository.cache.load_token()
+            user : User = User.query.get(user_id)
+            if not user:
+                return None
+
+            result = user.to_dict()
+            UserRepository.cache.set(user_id, result, token)
+            return pick(result, fields)
         except Exception as e:
             logging.error("Error fetching user by ID: %s", str(e), exc_info=True)
             return None
@@ -41,9 +98,8 @@ class UserRepository:
     @staticmethod
     def get_by_name(name : str):
         try:
-            with current_app.app_context():
-                user : User = User.query.filter_by(name=name).first()
-                return user.to_dict() if user else None
+            user : User = User.query.filter_by(name=name).first()
+            return user.to_dict() if user else None
         except Exception as e:
             logging.error("Error fetching user by name: %s", str(e), exc_info=True)
             return None
@@ -51,9 +107,8 @@ class UserRepository:
     @staticmethod
     def get_by_email(email : str):
         try:
-            with current_app.app_context():
-                user : User = User.query.filter_by(email=email).first()
-                return user.to_dict() if user else None
+            user : User = User.query.filter_by(email=email).first()
+            return user.to_dict() if user else None
         except Exception as e:
             logging.error("Error fetching user by email: %s", str(e), exc_info=True)
             return None
@@ -61,16 +116,18 @@ class UserRepository:
     @staticmethod
     def update_by_id(user_id :int , data : dict[str, str]):
         try:
-            with current_app.app_context():
-                user : User = User.query.get(user_id)
-                if not user:
-                    return None
-
-                user.name = data["name"]
-                user.email = data["email"]
-                user.document = data["document"]
-                db.session.commit()
-                return user.to_dict()
+            user : User = User.query.get(user_id)
+            if not user:
+                return None
+
+            user.name = data["name"]
+            user.email = data["email"]
+            user.document = data["document"]
+            TableVersionRepository.bump("user")
+            db.session.flush()
+            on_commit(UserRepository.cache.invalidate, user.id)
+            on_commit(UserRepository.names.put, user.id, user.name)
+            return user.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error updating user: %s", str(e), exc_info=True)
@@ -79,14 +136,17 @@ class UserRepository:
     @staticmethod
     def delete_by_id(user_id : int):
         try:
-            with current_app.app_context():
-                user : User = User.query.get(user_id)
-                if not user:
-                    return None
+            user : User = User.query.get(user_id)
+            if not user:
+                return None
 
-                db.session.delete(user)
-                db.session.commit()
-                return user.to_dict()
+            db.session.delete(user)
+            UserSummaryRepository.remove_user(user.id)
+            TableVersionRepository.bump("user")
+            db.session.flush()
+            on_commit(UserRepository.cache.invalidate, user.id)
+            on_commit(UserRepository.names.remove, user.id)
+            return user.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error deleting user: %s", str(e), exc_info=True)
@@ -95,14 +155,17 @@ class UserRepository:
     @staticmethod
     def delete_by_document(document : str):
         try:
-            with current_app.app_context():
-                user : User = User.query.filter_by(document=document).first()
-                if not user:
-                    return None
+            user : User = User.query.filter_by(document=document).first()
+            if not user:
+                return None
 
-                db.session.delete(user)
-                db.session.commit()
-                return user.to_dict()
+            db.session.delete(user)
+            UserSummaryRepository.remove_user(user.id)
+            TableVersionRepository.bump("user")
+            db.session.flush()
+            on_commit(UserRepository.cache.invalidate, user.id)
+            on_commit(UserRepository.names.remove, user.id)
+            return user.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error deleting user: %s", str(e), exc_info=True)
@@ -111,15 +174,91 @@ class UserRepository:
     @staticmethod
     def create(data):
         try:
-            with current_app.app_context():
-                new_user = User(name=data["name"], email=data["email"], document=data["document"])
-                db.session.add(new_user)
-                db.session.flush()
-                db.session.commit()
+            new_user = User(name=data["name"], email=data["email"], document=data["document"])
+            db.session.add(new_user)
+            db.session.flush()
+            TableVersionRepository.bump("user")
+            on_commit(UserRepository.names.put, new_user.id, new_user.name)
 
-                logging.info("User created successfully: %s", new_user.to_dict())
-                return new_user.to_dict()
+            logging.info("User created successfully: id=%s", new_user.id)
+            return new_user.to_dict()
         except Exception as e:
             db.session.rollback()
             logging.error("Error creating user: %s", str(e), exc_info=True)
             return {"error": "Internal Server Error"}, 500
+
+    @staticmethod
+    def bulk_create(rows : list[tuple[int, dict]], chunk_size : int):
+        """
+        Inserts already validated users in chunks, with one executemany and one commit per chunk.
+
+        Args:
+            rows: pairs of (index in the request, user data).
+            chunk_size: number of users inserted per DB transaction.
+
+        Returns:
+            list: one result per row, with status "created", "conflict" or "error".
+        """
+        results = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                results.extend(UserRepository._insert_chunk(chunk))
+            except Exception as e:
+                db.session.rollback()
+                logging.error("Error in bulk user chunk starting at %d: %s", start, str(e), exc_info=True)
+                results.extend({"index": index, "status": "error", "error": "Internal Server Error"} for index, _ in chunk)
+
+        return results
+
+    @staticmethod
+    def _insert_chunk(chunk : list[tuple[int, dict]]):
+        documents = [data["document"] for _, data in chunk]
+        existing = {document for (document,) in db.session.query(User.document).filter(User.document.in_(documents))}
+
+        results = []
+        to_insert = []
+        for index, data in chunk:
+            if data["document"] in existing:
+                results.append({"index": index, "status": "conflict", "error": "User with this document already exists"})
+                continue
+
+            existing.add(data["document"])
+            to_insert.append((index, data))
+
+        if not to_insert:
+            return results
+
+        values = [{"name": data["name"], "email": data["email"], "document": data["document"]} for _, data in to_insert]
+        try:
+            # Each chunk is its own transaction, committed now instead of at the end of the request
+            db.session.execute(insert(User), values)
+            ids = dict(db.session.query(User.document, User.id).filter(User.document.in_([v["document"] for v in values])))
+            TableVersionRepository.bump("user")
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request inserted one of the documents after the check, retry row by row.
+            db.session.rollback()
+            return results + UserRepository._insert_rows(to_insert)
+
+        for _, data in to_insert:
+            UserRepository.names.put(ids[data["document"]], data["name"])
+
+        results.extend({"index": index, "status": "created", "id": ids[data["document"]]} for index, data in to_insert)
+        return results
+
+    @staticmethod
+    def _insert_rows(rows : list[tuple[int, dict]]):
+        results = []
+        for index, data in rows:
+            try:
+                result = db.session.execute(insert(User).values(name=data["name"], email=data["email"], document=data["document"]))
+                TableVersionRepository.bump("user")
+                db.session.commit()
+                UserRepository.names.put(result.inserted_primary_key[0], data["name"])
+                results.append({"index": index, "status": "created", "id": result.inserted_primary_key[0]})
+            except IntegrityError:
+                db.session.rollback()
+                results.append({"index": index, "status": "conflict", "error": "User with this document already exists"})
+
+        return results
@@ -0,0 +1,170 @@
+import logging
+
+from sqlalchemy import case, delete, func, insert, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db import db
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.user_summary import UserSummary
+from app.repositories.status_repository import StatusRepository
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE, the others update first and insert when no row matched
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class UserSummaryRepository:
+    """
+    Keeps user_summary in step with the transactions. add()/remove() must be called inside the
+    writer's DB transaction, after the transaction row itself was flushed.
+    """
+
+    @staticmethod
+    def snapshot(transaction : Transaction):
+        """The values of ``transaction`` counted in the summary, taken before it is changed."""
+        return (transaction.user_id, transaction.status_id, transaction.quantity, transaction.total, transaction.transaction_date)
+
+    @staticmethod
+    def add(values : tuple):
+        user_id, status_id, quantity, total, transaction_date = values
+        increments = {
+            "transaction_count": UserSummary.transaction_count + 1,
+            "quantity": UserSummary.quantity + quantity,
+            "total_spent": UserSummary.total_spent + total,
+            "last_transaction_date": case(
+                (or_(UserSummary.last_transaction_date.is_(None), UserSummary.last_transaction_date < transaction_date), transaction_date),
+                else_=UserSummary.last_transaction_date
+            ),
+        }
+        row = {
+            "user_id": user_id,
+            "status_id": status_id,
+            "transaction_count": 1,
+            "quantity": quantity,
+            "total_spent": total,
+            "last_transaction_date": transaction_date,
+        }
+
+        # Inserted from a SELECT on the user, so a transaction of a deleted user (they are kept, see
+        # rebuild()) never brings its summary back, without an extra statement
+        columns = UserSummary.__table__.c
+        source = select(*(literal(value, columns[name].type) for name, value in row.items())).where(User.id == user_id)
+
+        upsert_insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+        if upsert_insert is not None:
+            db.session.execute(
+                upsert_insert(UserSummary).from_select(list(row), source)
+                .on_conflict_do_update(index_elements=["user_id", "status_id"], set_=increments)
+            )
+            return
+
+        updated = db.session.execute(
+            update(UserSummary)
+            .where(UserSummary.user_id == user_id, UserSummary.status_id == status_id)
+            .values(**increments)
+        ).rowcount
+        if not updated:
+            db.session.execute(insert(UserSummary).from_select(list(row), source))
+
+    @staticmethod
+    def remove(values : tuple):
+        user_id, status_id, quantity, total, transaction_date = values
+        key = (UserSummary.user_id == user_id, UserSummary.status_id == status_id)
+
+        # The last date only has to be looked up again when the removed transaction was the last one
+        last_remaining = (
+            select(func.max(Transaction.transaction_date))
+            .where(Transaction.user_id == user_id, Transaction.status_id == status_id)
+            .scalar_subquery()
+        )
+        db.session.execute(
+            update(UserSummary)
+            .where(*key)
+            .values(
+                transaction_count=UserSummary.transaction_count - 1,
+                quantity=UserSummary.quantity - quantity,
+                total_spent=UserSummary.total_spent - total,
+                last_transaction_date=case(
+                    (UserSummary.last_transaction_date <= transaction_date, last_remaining),
+                    else_=UserSummary.last_transaction_date
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            delete(UserSummary)
+            .where(*key, UserSummary.transaction_count <= 0)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def remove_user(user_id : int):
+        """Drops every summary row of ``user_id``, in the caller's DB transaction."""
+        db.session.execute(
+            delete(UserSummary)
+            .where(UserSummary.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def get_by_user_id(user_id : int):
+        """
+        Summary of the user's transactions, read from at most one row per status.
+
+        Returns None when the user has no transactions.
+        """
+        try:
+            rows = UserSummary.query.filter_by(user_id=user_id).all()
+            if not rows:
+                return None
+
+            last_dates = [row.last_transaction_date for row in rows if row.last_transaction_date is not None]
+            return {
+                "user_id": user_id,
+                "transaction_count": sum(row.transaction_count for row in rows),
+                "quantity": sum(row.quantity for row in rows),
+                "total_spent": round(sum(row.total_spent for row in rows), 2),
+                "last_transaction_date": max(last_dates) if last_dates else None,
+                "status_counts": {StatusRepository.get_name_by_id(row.status_id): row.transaction_count for row in rows},
+            }
+        except Exception as e:
+            logging.error("Error fetching user summary: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def rebuild():
+        """
+        Recomputes the whole table from the transactions, in the caller's DB transaction.
+
+        Returns:
+            tuple: the number of rows written and of rows that differed from the incremental values.
+        """
+        def key(row):
+            return (row.user_id, row.status_id)
+
+        def values(row):
+            return (row.transaction_count, row.quantity, round(row.total_spent, 6), row.last_transaction_date)
+
+        current = {key(row): values(row) for row in db.session.execute(select(UserSummary.__table__))}
+
+        fresh = db.session.execute(
+            select(
+                Transaction.user_id,
+                Transaction.status_id,
+                func.count().label("transaction_count"),
+                func.sum(Transaction.quantity).label("quantity"),
+                func.sum(Transaction.total).label("total_spent"),
+                func.max(Transaction.transaction_date).label("last_transaction_date"),
+            )
+            # Transactions of deleted users are kept, but their summary is not
+            .join(User, User.id == Transaction.user_id)
+            .group_by(Transaction.user_id, Transaction.status_id)
+        ).all()
+
+        rows = [dict(row._mapping) for row in fresh]
+        mismatched = sum(1 for row in fresh if current.pop(key(row), None) != values(row)) + len(current)
+
+        db.session.execute(delete(UserSummary).execution_options(synchronize_session=False))
+        if rows:
+            db.session.execute(insert(UserSummary), rows)
+        return len(rows), mismatched
@@ -0,0 +1,7 @@
+from flask import Blueprint
+
+from app.controllers.autocomplete_controller import AutocompleteController
+
+autocomplete_bp = Blueprint("autocomplete", __name__)
+
+autocomplete_bp.route("/autocomplete", methods=["GET"])(AutocompleteController.autocomplete)
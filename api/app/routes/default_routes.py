@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify
-from flasgger import swag_from
+from app.docs import swag_from
+
+from app.repositories.product_repository import ProductRepository
+from app.repositories.user_repository import UserRepository
 
 default_bp = Blueprint("default", __name__)
 
@@ -13,3 +16,14 @@ def home():
         Response: JSON response containing a welcome message and the API version.
     """
     return jsonify({"message": "It works, welcome to QA API", "api_ver": "1.0.0.0"}), 200
+
+
+@default_bp.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """
+    Hit/miss counters of the entity caches of this worker process.
+
+    Returns:
+        Response: JSON response with the stats of each cache.
+    """
+    return jsonify([UserRepository.cache.stats(), ProductRepository.cache.stats()]), 200
@@ -8,6 +8,8 @@ transaction_bp.route("/transactions", methods=["GET"])(TransactionController.get
 transaction_bp.route("/transaction", methods=["POST"])(TransactionController.create_transaction)
 transaction_bp.route("/transaction", methods=["PUT"])(TransactionController.update_transaction)
 transaction_bp.route("/transaction/status", methods=["PUT"])(TransactionController.update_transaction_status)
-transaction_bp.route("/transactions/<int:id>", methods=["GET"])(TransactionController.get_transaction_by_id)
-transaction_bp.route("/transactions/user/<int:id>", methods=["GET"])(TransactionController.get_transaction_by_user_id)
-transaction_bp.route("/transactions/<int:id>", methods=["DELETE"])(TransactionController.delete_transaction)
+transaction_bp.route("/transactions/stats", methods=["GET"])(TransactionController.get_transaction_stats)
+transaction_bp.route("/transactions/stats/<any(product, user, status, day):group_by>", methods=["GET"])(TransactionController.get_transaction_stats_by)
+transaction_bp.route("/transactions/<int:transaction_id>", methods=["GET"])(TransactionController.get_transaction_by_id)
+transaction_bp.route("/transactions/user/<int:user_id>", methods=["GET"])(TransactionController.get_transaction_by_user_id)
+transaction_bp.route("/transactions/<int:transaction_id>", methods=["DELETE"])(TransactionController.delete_transaction)
@@ -5,9 +5,12 @@ from app.controllers.user_controller import UserController
 user_bp = Blueprint("user", __name__)
 
 user_bp.route("/user", methods=["POST"])(UserController.create_user)
+user_bp.route("/users/bulk", methods=["POST"])(UserController.create_users_bulk)
 
 user_bp.route("/users", methods=["GET"])(UserController.get_users)
 user_bp.route("/user/<int:user_id>", methods=["GET"])(UserController.get_user_by_id)
+user_bp.route("/users/search", methods=["GET"])(UserController.search_users)
+user_bp.route("/users/<int:user_id>/summary", methods=["GET"])(UserController.get_user_summary)
 user_bp.route("/user/<string:name>", methods=["GET"])(UserController.get_user_by_name)
 user_bp.route("/user/<string:email>", methods=["GET"])(UserController.get_user_by_email)
 user_bp.route("/user/<string:document>", methods=["GET"])(UserController.get_user_by_document)
@@ -1,6 +1,8 @@
 import logging
 from app.repositories.status_repository import StatusRepository
 from app.models.status import Status
+from app.models.table_version import TableVersion
+from app.repositories.table_version_repository import TableVersionRepository
 from app.db import db
 
 def seed_status():
@@ -9,7 +11,7 @@ def seed_status():
     try:
         if not StatusRepository.is_table_empty():
             logging.debug("The table Status is already populated.")
-            return
+            return True
 
         for status_name in status_list:
             status = Status(name=status_name)
@@ -17,7 +19,30 @@ def seed_status():
 
         db.session.commit()
         logging.debug("The table Status has been populated.")
+        return True
 
     except Exception as e:
         logging.error("Error seeding status table: %s", str(e), exc_info=True)
-        db.session.rollback()  
\ No newline at end of file
+        db.session.rollback()  
+        return False
+
+
+def seed_table_versions():
+    try:
+        existing = {name for (name,) in db.session.query(TableVersion.name)}
+        missing = [name for name in TableVersionRepository.TABLES if name not in existing]
+        if not missing:
+            logging.debug("The table TableVersion is already populated.")
+            return True
+
+        for name in missing:
+            db.session.add(TableVersion(name=name, version=0))
+
+        db.session.commit()
+        logging.debug("The table TableVersion has been populated.")
+        return True
+
+    except Exception as e:
+        logging.error("Error seeding table_version table: %s", str(e), exc_info=True)
+        db.session.rollback()
+        return False
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import tempfile
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.db import db
+from app.models.schema_stamp import SchemaStamp
+from app.models.user_summary import UserSummary
+from app.repositories.user_summary_repository import UserSummaryRepository
+from app.seed.seed_db import seed_status, seed_table_versions
+from app.utils.search import SEARCH_INDEXES, create_search_indexes, search_ddl
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the API only runs as a single dev process
+    fcntl = None
+
+# Bump whenever seed_db changes the rows it writes, so existing databases are seeded again
+SEED_VERSION = 1
+STAMP_NAME = "app"
+
+
+def schema_hash():
+    """Hash of the DDL create_all() would emit for the current models, plus the SQLite search indexes."""
+    dialect = db.engine.dialect
+    digest = hashlib.sha256()
+    for table in db.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    if dialect.name == "sqlite":
+        for table in SEARCH_INDEXES:
+            digest.update("".join(search_ddl(table)).encode())
+    return digest.hexdigest()
+
+
+def _is_current(expected_hash : str):
+    try:
+        stamp = db.session.get(SchemaStamp, STAMP_NAME)
+        return stamp is not None and stamp.schema_hash == expected_hash and stamp.seed_version == SEED_VERSION
+    except SQLAlchemyError:
+        # No schema_stamp table yet
+        db.session.rollback()
+        return False
+
+
+def _create_missing_indexes():
+    """create_all() only creates the indexes of new tables, this adds the ones new to existing tables."""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+def _lock_path(app):
+    path = app.config.get("STARTUP_LOCK_FILE")
+    if path:
+        return path
+    database = zlib.crc32(app.config["SQLALCHEMY_DATABASE_URI"].encode())
+    return os.path.join(tempfile.gettempdir(), f"api-startup-{database:08x}.lock")
+
+
+@contextmanager
+def _startup_lock(app):
+    """Lets a single process of the host create the schema and seed, the others wait for it."""
+    if fcntl is None:
+        yield
+        return
+
+    with open(_lock_path(app), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def prepare_database(app):
+    """
+    Creates the tables and seeds them, unless the schema_stamp row shows it was already done for
+    the current models and SEED_VERSION. Must run inside an app context.
+
+    Returns True when the database had to be prepared.
+    """
+    expected_hash = schema_hash()
+    if _is_current(expected_hash):
+        return False
+
+    with _startup_lock(app):
+        # Another process may have prepared it while this one waited for the lock
+        if _is_current(expected_hash):
+            return False
+
+        existing_tables = set(inspect(db.engine).get_table_names())
+        db.create_all()
+        _create_missing_indexes()
+        create_search_indexes(db.session.connection())
+        if UserSummary.__tablename__ not in existing_tables:
+            # New table on a database that may already have transactions
+            UserSummaryRepository.rebuild()
+        db.session.commit()
+        if not (seed_status() and seed_table_versions()):
+            # Not stamped, so the next start tries again
+            return True
+
+        try:
+            db.session.merge(SchemaStamp(
+                name=STAMP_NAME,
+                schema_hash=expected_hash,
+                seed_version=SEED_VERSION,
+                updated_at=datetime.utcnow()
+            ))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logging.error("Error writing schema stamp: %s", str(e), exc_info=True)
+
+    logging.info("Database schema created and seeded (seed version %d)", SEED_VERSION)
+    return True
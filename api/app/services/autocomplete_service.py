@@ -0,0 +1,41 @@
+import logging
+import threading
+
+from flask import current_app
+
+from app.repositories.product_repository import ProductRepository
+from app.repositories.table_version_repository import TableVersionRepository
+from app.repositories.user_repository import UserRepository
+
+
+class AutocompleteService:
+    REPOSITORIES = {"user": UserRepository, "product": ProductRepository}
+
+    @staticmethod
+    def autocomplete(entity : str, prefix : str, limit : int):
+        try:
+            repository = AutocompleteService.REPOSITORIES[entity]
+            AutocompleteService._refresh_if_stale(entity, repository)
+            return repository.names.lookup(prefix, limit)
+        except Exception as e:
+            logging.error("Error in autocomplete: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def _refresh_if_stale(entity : str, repository):
+        """
+        Reloads the index in a background thread when another process changed the table, at most
+        once per AUTOCOMPLETE_REFRESH_SECONDS. Lookups keep using the current index meanwhile.
+        The writes of this process are already in the index and do not count.
+        """
+        version = TableVersionRepository.get_foreign_version(entity)
+        if not repository.names.needs_refresh(version, current_app.config["AUTOCOMPLETE_REFRESH_SECONDS"]):
+            return
+
+        app = current_app._get_current_object()
+
+        def reload():
+            with app.app_context():
+                repository.load_name_index()
+
+        threading.Thread(target=reload, name=f"{entity}-name-index", daemon=True).start()
@@ -1,19 +1,48 @@
 import logging
+import math
+
+from flask import current_app
 
 from app.repositories.product_repository import ProductRepository
 
 
 class ProductService:
     @staticmethod
-    def get_all_products():
+    def get_all_products(fields : tuple | None = None):
         try:
-            products = ProductRepository.get_all()
+            products = ProductRepository.get_all(fields)
             logging.info("Fetched %d Products", len(products))
             return products
         except Exception as e:
             logging.error("Error in get_all_products: %s", str(e), exc_info=True)
             return {"error": "Internal Server Error"}, 500
 
+    @staticmethod
+    def get_products_page(limit : int, after : int | None = None, fields : tuple | None = None):
+        try:
+            page = ProductRepository.get_page(limit, after, fields)
+            if isinstance(page, dict):
+                logging.info("Fetched %d Products (next cursor: %s)", len(page["items"]), page["next_cursor"])
+            return page
+        except Exception as e:
+            logging.error("Error in get_products_page: %s", str(e), exc_info=True)
+            return {"error": "Internal Server Error"}, 500
+
+    @staticmethod
+    def search_products(search : str, limit : int, offset : int = 0):
+        try:
+            page = ProductRepository.search(search, limit, offset)
+            if isinstance(page, dict):
+                logging.info("Found %d Products for %r (next offset: %s)", len(page["items"]), search, page["next_offset"])
+            return page
+        except Exception as e:
+            logging.error("Error in search_products: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def stream_products(fields : tuple | None = None):
+        return ProductRepository.iter_all(current_app.config["STREAM_BATCH_SIZE"], fields)
+
     @staticmethod
     def create_product(data : dict[str, str]):
         try:
@@ -24,9 +53,9 @@ class ProductService:
             return {"error": "Internal Server Error"}, 500
 
     @staticmethod
-    def get_product_by_id(product_id : int):
+    def get_product_by_id(product_id : int, fields : tuple | None = None):
         try:
-            product = ProductRepository.get_by_id(product_id)
+            product = ProductRepository.get_by_id(product_id, fields)
             return product
         except Exception as e:
             logging.error("Error in get_product_by_id: %s", str(e), exc_info=True)
@@ -103,3 +132,78 @@ class ProductService:
         except Exception as e:
             logging.error("Error in update_product_description: %s", str(e), exc_info=True)
             return None
+
+    @staticmethod
+    def import_products(rows, chunk_size : int, upsert : bool = False):
+        """
+        Validates and writes products coming from an iterator of (row number, raw row) pairs.
+
+        Only one chunk is kept in memory at a time and at most IMPORT_MAX_REPORTED_ERRORS row
+        errors are returned, so the memory used does not depend on the size of the upload.
+        """
+        max_errors = current_app.config["IMPORT_MAX_REPORTED_ERRORS"]
+        report = {"processed": 0, "inserted": 0, "updated": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+        def add_error(row_number, error):
+            report["failed"] += 1
+            if len(report["errors"]) < max_errors:
+                report["errors"].append({"row": row_number, "error": error})
+            else:
+                report["errors_truncated"] = True
+
+        def flush(chunk):
+            written = ProductRepository.bulk_import([data for _, data in chunk], upsert)
+            if written is None:
+                for row_number, _ in chunk:
+                    add_error(row_number, "Internal Server Error")
+                return
+
+            report["inserted"] += written[0]
+            report["updated"] += written[1]
+            logging.info("Product import progress: %d rows processed, %d inserted, %d updated, %d failed",
+                         report["processed"], report["inserted"], report["updated"], report["failed"])
+
+        chunk = []
+        for row_number, raw in rows:
+            report["processed"] += 1
+            data, error = ProductService.parse_product_row(raw)
+            if error:
+                add_error(row_number, error)
+                continue
+
+            chunk.append((row_number, data))
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+
+        if chunk:
+            flush(chunk)
+
+        return report
+
+    @staticmethod
+    def parse_product_row(raw):
+        if not isinstance(raw, dict):
+            return None, "Invalid row, expected an object"
+
+        name = raw.get("name")
+        if not isinstance(name, str) or not name.strip() or len(name) > 100:
+            return None, "Invalid field 'name', expected a non-empty string up to 100 characters"
+
+        try:
+            price = float(raw.get("price"))
+            stock = int(raw.get("stock"))
+        except (TypeError, ValueError):
+            return None, "Invalid fields 'price'/'stock', expected numbers"
+
+        if not math.isfinite(price):
+            return None, "Invalid field 'price', expected a finite number"
+
+        if price < 0 or stock < 0:
+            return None, "Invalid fields 'price'/'stock', expected non-negative numbers"
+
+        description = raw.get("description") or None
+        if description is not None and (not isinstance(description, str) or len(description) > 255):
+            return None, "Invalid field 'description', expected a string up to 255 characters"
+
+        return {"name": name.strip(), "price": price, "stock": stock, "description": description}, None
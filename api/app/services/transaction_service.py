@@ -1,17 +1,19 @@
 import logging
 
+from flask import current_app
+
 from app.repositories.transaction_repository import TransactionRepository
 from app.models.transaction import Transaction
 
-from app.models.status import Status
+from app.repositories.status_repository import StatusRepository
 from sqlalchemy.dialects.oracle import NUMBER
 
 
 class TransactionService:
     @staticmethod
-    def get_all_transactions():
+    def get_all_transactions(fields: tuple | None = None):
         try:
-            transactions = TransactionRepository.get_all()
+            transactions = TransactionRepository.get_all(fields)
             if transactions is not None:
                 logging.info("Fetched %d transactions", len(transactions))
             else:
@@ -22,18 +24,44 @@ class TransactionService:
             return {"error": "Internal Server Error"}, 500
         
     @staticmethod
-    def get_transaction_by_id(transaction_id: int):
+    def get_transactions_page(limit: int, after: int | None = None, fields: tuple | None = None):
         try:
-            transaction = TransactionRepository.get_by_id(transaction_id)
+            page = TransactionRepository.get_page(limit, after, fields)
+            if page is not None:
+                logging.info("Fetched %d transactions (next cursor: %s)", len(page["items"]), page["next_cursor"])
+            return page
+        except Exception as e:
+            logging.error("Error in get_transactions_page: %s", str(e), exc_info=True)
+            return {"error": "Internal Server Error"}, 500
+        
+    @staticmethod
+    def stream_transactions(fields: tuple | None = None):
+        return TransactionRepository.iter_all(current_app.config["STREAM_BATCH_SIZE"], fields)
+        
+    @staticmethod
+    def get_transaction_stats(group_by: str | None = None, start=None, end=None):
+        try:
+            stats = TransactionRepository.get_stats(group_by, start, end)
+            if isinstance(stats, list):
+                logging.info("Fetched transaction stats for %d %s groups", len(stats), group_by)
+            return stats
+        except Exception as e:
+            logging.error("Error in get_transaction_stats: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def get_transaction_by_id(transaction_id: int, fields: tuple | None = None):
+        try:
+            transaction = TransactionRepository.get_by_id(transaction_id, fields)
             return transaction
         except Exception as e:
             logging.error("Error in get_transaction_by_id: %s", str(e), exc_info=True)
             return None
         
     @staticmethod
-    def get_transaction_by_user_id(user_id: int):
+    def get_transaction_by_user_id(user_id: int, fields: tuple | None = None):
         try:
-            transaction = TransactionRepository.get_by_user_id(user_id)
+            transaction = TransactionRepository.get_by_user_id(user_id, fields)
             return transaction
         except Exception as e:
             logging.error("Error in get_transaction_by_user_id: %s", str(e), exc_info=True)
@@ -42,22 +70,20 @@ class TransactionService:
     @staticmethod
     def create_transaction(data: dict):
         try:
+            status_name = data.pop("status", None)
             if not isinstance(data["status_id"], int):
-                status_name = data.pop("status", None)
-                status = Status.query.filter_by(name=status_name).first()
+                status_id = StatusRepository.get_id_by_name(status_name)
 
-                if not status:
+                if status_id is None:
                     logging.error("Status invalid: %s", status_name)
                     return None
-                data["status_id"] = status.id
+                data["status_id"] = status_id
+            elif StatusRepository.get_name_by_id(data["status_id"]) is None:
+                logging.error("Status invalid: %s", data["status_id"])
+                return None
 
             transaction = Transaction(**data)
             logging.info("Creating transaction: %s", transaction)
-            
-            check_stock = TransactionRepository.check_stock(transaction.product_id, transaction.quantity)
-            if not check_stock:
-                logging.error("Stock unavailable for product_id: %s", transaction.product_id)
-                return None
 
             transaction = TransactionRepository.create_transaction(transaction)
 
@@ -87,7 +113,12 @@ class TransactionService:
     @staticmethod
     def update_transaction_status(transaction_id: int, status: str):
         try:
-            transaction = TransactionRepository.update_transaction_status(transaction_id, status)
+            status_id = StatusRepository.get_id_by_name(status)
+            if status_id is None:
+                logging.error("Status invalid: %s", status)
+                return None
+
+            transaction = TransactionRepository.update_transaction_status(transaction_id, status_id)
             return transaction
         except Exception as e:
             logging.error("Error in update_transaction_status: %s", str(e), exc_info=True)
@@ -1,18 +1,47 @@
 import logging
 
+from flask import current_app
+
 from app.repositories.user_repository import UserRepository
+from app.repositories.user_summary_repository import UserSummaryRepository
 
 class UserService:
     @staticmethod
-    def get_all_users():
+    def get_all_users(fields : tuple | None = None):
         try:
-            users = UserRepository.get_all()
+            users = UserRepository.get_all(fields)
             logging.info("Fetched %d users", len(users))
             return users
         except Exception as e:
             logging.error("Error in get_all_users: %s", str(e), exc_info=True)
             return {"error": "Internal Server Error"}, 500
 
+    @staticmethod
+    def get_users_page(limit : int, after : int | None = None, fields : tuple | None = None):
+        try:
+            page = UserRepository.get_page(limit, after, fields)
+            if isinstance(page, dict):
+                logging.info("Fetched %d users (next cursor: %s)", len(page["items"]), page["next_cursor"])
+            return page
+        except Exception as e:
+            logging.error("Error in get_users_page: %s", str(e), exc_info=True)
+            return {"error": "Internal Server Error"}, 500
+
+    @staticmethod
+    def search_users(search : str, limit : int, offset : int = 0):
+        try:
+            page = UserRepository.search(search, limit, offset)
+            if isinstance(page, dict):
+                logging.info("Found %d users for %r (next offset: %s)", len(page["items"]), search, page["next_offset"])
+            return page
+        except Exception as e:
+            logging.error("Error in search_users: %s", str(e), exc_info=True)
+            return None
+
+    @staticmethod
+    def stream_users(fields : tuple | None = None):
+        return UserRepository.iter_all(current_app.config["STREAM_BATCH_SIZE"], fields)
+
     @staticmethod
     def create_user(data : dict):
         try:
@@ -29,7 +58,6 @@ class UserService:
             #    return {"error": "User with this email already exists"}, 409
 
             new_user = UserRepository.create(data)
-            logging.info("User created successfully: %s", new_user)
 
             return new_user  # O controller define o status 201
 
@@ -38,14 +66,36 @@ class UserService:
             return {"error": "Internal Server Error"}, 500
 
     @staticmethod
-    def get_user_by_id(user_id: int):
+    def get_user_by_id(user_id : int, fields : tuple | None = None):
         try:
-            user = UserRepository.get_by_id(user_id)
+            user = UserRepository.get_by_id(user_id, fields)
             return user
         except Exception as e:
             logging.error("Error in get_user_by_id: %s", str(e), exc_info=True)
             return None
 
+    @staticmethod
+    def get_user_summary(user_id: int):
+        """The user's summary, with zeros when the user exists but has no transactions."""
+        try:
+            summary = UserSummaryRepository.get_by_user_id(user_id)
+            if summary is not None:
+                return summary
+
+            if UserRepository.get_by_id(user_id) is None:
+                return None
+            return {
+                "user_id": user_id,
+                "transaction_count": 0,
+                "quantity": 0,
+                "total_spent": 0.0,
+                "last_transaction_date": None,
+                "status_counts": {},
+            }
+        except Exception as e:
+            logging.error("Error in get_user_summary: %s", str(e), exc_info=True)
+            return None
+
     @staticmethod
     def get_user_by_name(name : str):
         try:
@@ -99,3 +149,43 @@ class UserService:
         except Exception as e:
             logging.error("Error in get_user_by_document: %s", str(e), exc_info=True)
             return None
+
+    @staticmethod
+    def bulk_create_users(items : list, chunk_size : int):
+        try:
+            valid = []
+            results = []
+            for index, data in enumerate(items):
+                error = UserService.validate_user(data)
+                if error:
+                    results.append({"index": index, "status": "invalid", "error": error})
+                else:
+                    valid.append((index, data))
+
+            results.extend(UserRepository.bulk_create(valid, chunk_size))
+            results.sort(key=lambda result: result["index"])
+
+            summary = {status: 0 for status in ("created", "conflict", "invalid", "error")}
+            for result in results:
+                summary[result["status"]] += 1
+
+            logging.info("Bulk user creation: %s", summary)
+            return {"summary": summary, "results": results}
+        except Exception as e:
+            logging.error("Error in bulk_create_users: %s", str(e), exc_info=True)
+            return {"error": "Internal Server Error"}, 500
+
+    @staticmethod
+    def validate_user(data):
+        if not isinstance(data, dict):
+            return "Invalid user, expected a JSON object"
+
+        missing = [field for field in ("name", "email", "document") if not data.get(field)]
+        if missing:
+            return f"Missing required fields ({', '.join(missing)})"
+
+        for field in ("name", "email", "document"):
+            if not isinstance(data[field], str) or len(data[field]) > 100:
+                return f"Invalid field '{field}', expected a string up to 100 characters"
+
+        return None
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class EntityCache:
+    """
+    Thread-safe LRU cache of serialized entities with a TTL, local to the worker process.
+
+    Writes must call invalidate(). Other workers only see a write once their entry expires,
+    so the TTL is the maximum staleness between processes.
+    """
+
+    def __init__(self, name : str, maxsize : int = 10000, ttl : float = 10.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize : int, ttl : float):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def load_token(self):
+        """Must be taken before reading from the DB and passed to set()."""
+        return self._invalidations
+
+    def set(self, key, value : dict, token : int):
+        with self._lock:
+            # Something was invalidated while the value was loaded, it may already be stale
+            if token != self._invalidations or self.maxsize <= 0:
+                return
+
+            self._entries[key] = (time.monotonic() + self.ttl, dict(value))
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
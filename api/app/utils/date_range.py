@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from flask import request
+
+
+class DateRangeError(ValueError):
+    pass
+
+
+def _parse_bound(value : str, name : str):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise DateRangeError(f"Invalid date range, '{name}' must be an ISO 8601 date or datetime")
+
+    if parsed.tzinfo is not None:
+        # transaction_date is stored as naive UTC
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # Only a date: the whole day is included
+    return parsed, len(value) == 10
+
+
+def parse_date_range(args=None):
+    """
+    Reads ``from`` and ``to`` from the query string (``args`` defaults to the current request).
+
+    Returns:
+        tuple: ``start`` (inclusive) and ``end`` (exclusive) datetimes, None when not sent. A ``to``
+        given as a date includes that whole day.
+    """
+    args = request.args if args is None else args
+    start = end = None
+
+    if args.get("from"):
+        start, _ = _parse_bound(args["from"], "from")
+
+    if args.get("to"):
+        end, date_only = _parse_bound(args["to"], "to")
+        end = end + timedelta(days=1) if date_only else end + timedelta(microseconds=1)
+
+    if start is not None and end is not None and start >= end:
+        raise DateRangeError("Invalid date range, 'from' must be before 'to'")
+
+    return start, end
@@ -0,0 +1,47 @@
+import functools
+import zlib
+
+from flask import make_response, request
+
+from app.middlewares.compression import etag_variants
+from app.repositories.table_version_repository import TableVersionRepository
+from app.utils.streaming import wants_ndjson
+
+
+def conditional_on(*tables : str):
+    """
+    Adds an ETag to the view response, derived from the version of ``tables`` and the request.
+
+    When If-None-Match matches, answers 304 before the view runs, so no rows are read or serialized.
+    The compression middleware appends the encoding to the ETag, those variants match as well.
+    The versions are read before the view, so a concurrent write can only make the ETag older than
+    the body, never newer.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = TableVersionRepository.get_versions(tables)
+            if versions is None:
+                return view(*args, **kwargs)
+
+            variant = zlib.crc32(f"{request.full_path}|{wants_ndjson()}".encode())
+            etag = "-".join(f"{table}{version}" for table, version in zip(tables, versions)) + f"-{variant:08x}"
+
+            matched = next((tag for tag in etag_variants(etag) if request.if_none_match.contains(tag)), None)
+            if matched is not None:
+                response = make_response("", 304)
+                response.set_etag(matched)
+                # Same Vary as the full response, for the caches revalidating it
+                response.vary.add("Accept")
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                # The body and the ETag depend on Accept (JSON or NDJSON)
+                response.vary.add("Accept")
+            return response
+
+        return wrapper
+
+    return decorator
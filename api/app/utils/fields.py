@@ -0,0 +1,44 @@
+from flask import request
+from sqlalchemy.orm import load_only
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def parse_fields(model, args=None):
+    """
+    Reads the ``fields`` sparse fieldset from the query string (``args`` defaults to the current request).
+
+    Returns:
+        tuple: the requested keys of ``model.to_dict()`` in the order sent, or None when ``fields`` is absent.
+    """
+    args = request.args if args is None else args
+    raw = args.get("fields")
+    if raw is None:
+        return None
+
+    fields = tuple(dict.fromkeys(field.strip() for field in raw.split(",") if field.strip()))
+    if not fields:
+        raise FieldsError("Invalid fields, 'fields' must list at least one field")
+
+    unknown = [field for field in fields if field not in model.FIELDS]
+    if unknown:
+        raise FieldsError(f"Invalid fields {', '.join(unknown)}, available: {', '.join(model.FIELDS)}")
+    return fields
+
+
+def only_fields(query, model, fields : tuple | None):
+    """Narrows the SELECT of ``query`` to the columns behind ``fields`` (the primary key is always loaded)."""
+    if not fields:
+        return query
+
+    columns = getattr(model, "FIELD_COLUMNS", {})
+    return query.options(load_only(*(getattr(model, columns.get(field, field)) for field in fields)))
+
+
+def pick(data : dict, fields : tuple | None):
+    """Keeps only ``fields`` of an already serialized entity, e.g. one read from a cache."""
+    if not fields:
+        return data
+    return {field: data[field] for field in fields}
@@ -0,0 +1,56 @@
+from flask import current_app, request
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def wants_all(args=None):
+    """
+    True when the client opted in to the whole list with ``?all=1``; listings are paginated by
+    default so a request never loads an unbounded number of rows.
+    """
+    args = request.args if args is None else args
+    return args.get("all", "").lower() in ("1", "true")
+
+
+def parse_page_args(args=None, config=None):
+    """Reads ``limit`` and ``after`` from the query string, ``args``/``config`` default to the current request and app."""
+    args = request.args if args is None else args
+    config = current_app.config if config is None else config
+    max_page_size = config["MAX_PAGE_SIZE"]
+
+    try:
+        limit = int(args.get("limit", config["DEFAULT_PAGE_SIZE"]))
+        after = args.get("after")
+        after = int(after) if after not in (None, "") else None
+    except ValueError:
+        raise PaginationError("Invalid pagination parameters, 'limit' and 'after' must be integers")
+
+    if limit < 1:
+        raise PaginationError("Invalid pagination parameters, 'limit' must be greater than zero")
+
+    return min(limit, max_page_size), after
+
+
+def keyset_page(query, key_column, limit : int, after : int | None = None):
+    """
+    Fetches one page of rows ordered by ``key_column``, starting right after the ``after`` cursor.
+
+    Returns:
+        tuple: the rows of the page and the cursor for the next page (None on the last page).
+    """
+    if after is not None:
+        query = query.filter(key_column > after)
+
+    rows = query.order_by(key_column).limit(limit + 1).all()
+    return split_page(rows, key_column, limit)
+
+
+def split_page(rows : list, key_column, limit : int):
+    """Takes the ``limit + 1`` rows fetched for a page and returns the page and the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, getattr(rows[-1], key_column.key)
@@ -0,0 +1,126 @@
+import bisect
+import threading
+import time
+import unicodedata
+
+# Separates the normalized name, the name and the id inside a key; sorts before any character
+_SEP = "\x00"
+
+
+def normalize(text : str):
+    """Lowercase, without accents and with single spaces: "  Café  Gamer" -> "cafe gamer"."""
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Thread-safe sorted array of normalized names, local to the worker process, for prefix lookups.
+
+    Each entry is a single string "normalized\\0name\\0id", so a lookup is a binary search plus a
+    scan of the matches. Writes of this process are applied with put()/remove() after commit;
+    writes of other processes are picked up by a full reload, see needs_refresh(). The version
+    given to load() and needs_refresh() must only count the writes of other processes, or every
+    local write would trigger a reload.
+    """
+
+    def __init__(self, name : str):
+        self.name = name
+        self.version = None
+        self._keys = []
+        self._key_by_id = {}
+        self._built_at = 0.0
+        self._refreshing = False
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(row_id : int, name : str):
+        return f"{normalize(name)}{_SEP}{name}{_SEP}{row_id}"
+
+    def load(self, rows, version : int | None = None):
+        """Replaces the whole index with ``rows`` of (id, name), read at the foreign ``version`` of the table."""
+        key_by_id = {row_id: self._key(row_id, name) for row_id, name in rows if name}
+        keys = sorted(key_by_id.values())
+
+        with self._lock:
+            self._keys = keys
+            self._key_by_id = key_by_id
+            self.version = version
+            self._built_at = time.monotonic()
+            self._refreshing = False
+            # Writes committed while the rows were read may be missing from them
+            pending, self._pending = self._pending, []
+            for operation, args in pending:
+                operation(*args)
+
+    def needs_refresh(self, version : int | None, max_age : float):
+        """
+        True when another process changed the table since the last load and the index is older
+        than ``max_age`` seconds. The caller must then reload it; until load() runs, other callers get False.
+        """
+        with self._lock:
+            if (version is None or version == self.version or self._refreshing or max_age <= 0
+                    or time.monotonic() - self._built_at < max_age):
+                return False
+            self._refreshing = True
+            return True
+
+    def refresh_failed(self):
+        with self._lock:
+            self._refreshing = False
+            self._pending = []
+
+    def put(self, row_id : int, name : str):
+        with self._lock:
+            self._put(row_id, name)
+            if self._refreshing:
+                self._pending.append((self._put, (row_id, name)))
+
+    def _put(self, row_id : int, name : str):
+        self._remove(row_id)
+        if name:
+            key = self._key(row_id, name)
+            bisect.insort(self._keys, key)
+            self._key_by_id[row_id] = key
+
+    def remove(self, row_id : int):
+        with self._lock:
+            self._remove(row_id)
+            if self._refreshing:
+                self._pending.append((self._remove, (row_id,)))
+
+    def _remove(self, row_id : int):
+        key = self._key_by_id.pop(row_id, None)
+        if key is None:
+            return
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def lookup(self, prefix : str, limit : int):
+        """Up to ``limit`` {"id", "name"} whose normalized name starts with ``prefix``, in alphabetical order."""
+        prefix = normalize(prefix)
+        results = []
+        with self._lock:
+            keys = self._keys
+            position = bisect.bisect_left(keys, prefix)
+            while position < len(keys) and len(results) < limit:
+                key = keys[position]
+                if not key.startswith(prefix):
+                    break
+                name, row_id = key.split(_SEP, 1)[1].rsplit(_SEP, 1)
+                results.append({"id": int(row_id), "name": name})
+                position += 1
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._keys),
+                "version": self.version,
+                "age_seconds": round(time.monotonic() - self._built_at, 1) if self._built_at else None,
+            }
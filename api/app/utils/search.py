@@ -0,0 +1,132 @@
+"""
+Full-text search over products and users.
+
+On SQLite each table gets an external content FTS5 index (``<table>_fts``) kept in sync by
+triggers, so every insert, bulk import, update and delete is indexed in the writer's transaction.
+Other databases fall back to an unranked case-insensitive substring match.
+"""
+import re
+
+from flask import current_app, request
+from sqlalchemy import or_, text
+
+from app.db import db
+
+# Table -> indexed columns, the first one weighs the most in the ranking
+SEARCH_INDEXES = {
+    "product": ("name", "description"),
+    "user": ("name", "email"),
+}
+RANK_WEIGHTS = "10.0, 1.0"
+
+
+class SearchError(ValueError):
+    pass
+
+
+def search_ddl(table : str):
+    """Statements creating the FTS5 table of ``table`` and its triggers, safe to run again."""
+    columns = SEARCH_INDEXES[table]
+    fts = f"{table}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});"
+
+    return [
+        # remove_diacritics makes "cafe" match "café"; the prefix indexes serve "term*" queries
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON "{table}" BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON "{table}" BEGIN {delete_old} END',
+        # Only the indexed columns, a stock change does not touch the index
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON "{table}" BEGIN {delete_old} {insert_new} END',
+    ]
+
+
+def create_search_indexes(connection):
+    """
+    Creates the missing FTS5 tables and triggers on SQLite and indexes the rows already there.
+
+    Returns the names of the tables whose index was created.
+    """
+    if connection.dialect.name != "sqlite":
+        return []
+
+    existing = {name for (name,) in connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    created = []
+    for table in SEARCH_INDEXES:
+        fts = f"{table}_fts"
+        for statement in search_ddl(table):
+            connection.execute(text(statement))
+
+        if fts not in existing:
+            connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+            connection.execute(text(f"INSERT INTO {fts}({fts}, rank) VALUES ('rank', 'bm25({RANK_WEIGHTS})')"))
+            created.append(table)
+    return created
+
+
+def match_query(search : str):
+    """
+    Turns free text into an FTS5 query: every word must match, the last one as a prefix.
+    Returns None when there is no word to search for.
+    """
+    terms = re.findall(r"\w+", search)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+
+def parse_search_args(args=None, config=None):
+    """Reads ``q``, ``limit`` and ``offset`` from the query string, ``args``/``config`` default to the current request and app."""
+    args = request.args if args is None else args
+    config = current_app.config if config is None else config
+
+    search = args.get("q", "").strip()
+    if match_query(search) is None:
+        raise SearchError("Invalid search, 'q' must contain at least one letter or digit")
+
+    try:
+        limit = int(args.get("limit", config["DEFAULT_PAGE_SIZE"]))
+        offset = int(args.get("offset", 0))
+    except ValueError:
+        raise SearchError("Invalid search parameters, 'limit' and 'offset' must be integers")
+
+    if limit < 1 or offset < 0:
+        raise SearchError("Invalid search parameters, 'limit' must be greater than zero and 'offset' not negative")
+
+    return search, min(limit, config["MAX_PAGE_SIZE"]), offset
+
+
+def search_page(model, search : str, limit : int, offset : int = 0):
+    """
+    Fetches one page of ``model`` rows matching ``search``, best match first.
+
+    Returns:
+        tuple: the rows of the page and the offset of the next page (None on the last page).
+    """
+    table = model.__tablename__
+
+    if db.session.get_bind().dialect.name == "sqlite":
+        fts = f"{table}_fts"
+        statement = text(
+            f'SELECT "{table}".* FROM {fts} JOIN "{table}" ON "{table}".id = {fts}.rowid '
+            f"WHERE {fts} MATCH :match ORDER BY {fts}.rank LIMIT :limit OFFSET :offset"
+        ).bindparams(match=match_query(search), limit=limit + 1, offset=offset)
+        rows = db.session.query(model).from_statement(statement).all()
+    else:
+        pattern = f"%{search}%"
+        rows = (
+            model.query
+            .filter(or_(*(getattr(model, column).ilike(pattern) for column in SEARCH_INDEXES[table])))
+            .order_by(model.id)
+            .limit(limit + 1)
+            .offset(offset)
+            .all()
+        )
+
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], offset + limit
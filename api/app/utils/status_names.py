@@ -0,0 +1,57 @@
+import threading
+import time
+from types import MappingProxyType
+
+
+class StatusNames:
+    """
+    Process-local map between status ids and names, read by the models without touching the DB.
+
+    The maps are replaced as a whole, so readers never see a half-built one. Statuses created by
+    this process are added after commit; the ones created by other processes are picked up by a
+    reload, which refresh_due() allows at most once every ``refresh_seconds``.
+    """
+
+    def __init__(self, refresh_seconds : float = 60.0):
+        self.refresh_seconds = refresh_seconds
+        self._maps = (MappingProxyType({}), MappingProxyType({}))
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, refresh_seconds : float):
+        self.refresh_seconds = refresh_seconds
+
+    def load(self, rows):
+        """Replaces both maps with ``rows`` of (id, name)."""
+        rows = list(rows)
+        maps = (
+            MappingProxyType({name: status_id for status_id, name in rows}),
+            MappingProxyType({status_id: name for status_id, name in rows}),
+        )
+        # Under the lock, so a concurrent add() never writes back maps built from the old ones
+        with self._lock:
+            self._maps = maps
+            self._checked_at = time.monotonic()
+
+    def add(self, status_id : int, name : str):
+        with self._lock:
+            ids, names = self._maps
+            self._maps = (MappingProxyType({**ids, name: status_id}), MappingProxyType({**names, status_id: name}))
+
+    def id_by_name(self, name : str):
+        return self._maps[0].get(name)
+
+    def name_by_id(self, status_id : int):
+        return self._maps[1].get(status_id)
+
+    def refresh_due(self):
+        """True at most once every ``refresh_seconds``, the caller must then reload the maps."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.refresh_seconds:
+                return False
+            self._checked_at = now
+            return True
+
+
+status_names = StatusNames()
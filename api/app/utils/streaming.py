@@ -0,0 +1,58 @@
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+NDJSON_CHUNK_ROWS = 500
+
+
+def wants_ndjson():
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def ndjson_response(rows):
+    """
+    Streams an iterable of dicts as newline delimited JSON.
+
+    Lines are grouped in chunks of NDJSON_CHUNK_ROWS rows so the server does not issue one write per row.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        chunk = []
+        for row in rows:
+            chunk.append(dumps(row, separators=(",", ":")))
+            if len(chunk) >= NDJSON_CHUNK_ROWS:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def iter_ndjson(stream, strict : bool = True):
+    """
+    Parses a newline delimited JSON stream one line at a time.
+
+    Yields:
+        tuple: the line number and the decoded JSON value, blank lines are skipped.
+        When ``strict`` is False an invalid line yields None instead of raising.
+
+    Raises:
+        ValueError: when a line is not valid JSON and ``strict`` is set.
+    """
+    loads = current_app.json.loads
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            value = loads(line)
+        except ValueError:
+            if strict:
+                raise ValueError(f"Invalid JSON at line {line_number}")
+            value = None
+
+        yield line_number, value
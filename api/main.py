@@ -1,4 +1,3 @@
-import logging
 import os
 
 from dotenv import load_dotenv
@@ -8,10 +7,11 @@ from flask_cors import CORS
 
 from app import create_app
 from app.db import db
+from app.logging_config import configure_logging
 
 load_dotenv()
 
-logging.basicConfig(level=logging.DEBUG)
+configure_logging()
 
 app = create_app()
 CORS(app)
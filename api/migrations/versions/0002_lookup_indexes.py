@@ -0,0 +1,42 @@
+"""indexes for lookup columns
+
+Revision ID: 0002_lookup_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 09:10:00.000000
+
+db.create_all() already creates these indexes on new databases, so each index is only
+created when it is missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_lookup_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_user_name', 'user', ['name']),
+    ('ix_user_email', 'user', ['email']),
+    ('ix_product_name', 'product', ['name']),
+    ('ix_product_price', 'product', ['price']),
+    ('ix_transaction_user_id', 'transaction', ['user_id']),
+    ('ix_transaction_product_id', 'transaction', ['product_id']),
+    ('ix_transaction_status_id', 'transaction', ['status_id']),
+    ('ix_transaction_transaction_date', 'transaction', ['transaction_date']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for name, table, columns in INDEXES:
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,32 @@
+"""table versions used for ETags
+
+Revision ID: 0003_table_version
+Revises: 0002_lookup_indexes
+Create Date: 2026-10-18 10:00:00.000000
+
+The rows are created by seed_table_versions() when the app starts.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_table_version'
+down_revision = '0002_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'table_version' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('table_version',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_version')
@@ -0,0 +1,34 @@
+"""schema stamp checked on startup
+
+Revision ID: 0004_schema_stamp
+Revises: 0003_table_version
+Create Date: 2026-10-18 12:00:00.000000
+
+The row is written by prepare_database() the next time the app starts.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_schema_stamp'
+down_revision = '0003_table_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'schema_stamp' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('schema_stamp',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('schema_hash', sa.String(length=64), nullable=False),
+        sa.Column('seed_version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('schema_stamp')
@@ -0,0 +1,29 @@
+"""covering index for the transaction stats
+
+Revision ID: 0005_transaction_stats_index
+Revises: 0004_schema_stamp
+Create Date: 2026-10-18 14:00:00.000000
+
+prepare_database() already creates it on startup, so it is only created when it is missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_transaction_stats_index'
+down_revision = '0004_schema_stamp'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_transaction_date_totals'
+COLUMNS = ['transaction_date', 'product_id', 'user_id', 'status_id', 'quantity', 'total']
+
+
+def upgrade():
+    if INDEX not in {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('transaction')}:
+        op.create_index(INDEX, 'transaction', COLUMNS, unique=False)
+
+
+def downgrade():
+    op.drop_index(INDEX, table_name='transaction')
@@ -0,0 +1,43 @@
+"""per-user transaction summary
+
+Revision ID: 0006_user_summary
+Revises: 0005_transaction_stats_index
+Create Date: 2026-10-18 15:00:00.000000
+
+The table is filled from the existing transactions, as ``flask user-summary rebuild`` does.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_user_summary'
+down_revision = '0005_transaction_stats_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'user_summary' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('user_summary',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status_id', sa.Integer(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('total_spent', sa.Float(), nullable=False),
+        sa.Column('last_transaction_date', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['status_id'], ['status.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'status_id')
+    )
+    op.execute(
+        'INSERT INTO user_summary (user_id, status_id, transaction_count, quantity, total_spent, last_transaction_date) '
+        'SELECT user_id, status_id, count(*), sum(quantity), sum(total), max(transaction_date) '
+        'FROM "transaction" GROUP BY user_id, status_id'
+    )
+
+
+def downgrade():
+    op.drop_table('user_summary')
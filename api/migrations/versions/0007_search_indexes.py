@@ -0,0 +1,33 @@
+"""FTS5 search indexes of products and users
+
+Revision ID: 0007_search_indexes
+Revises: 0006_user_summary
+Create Date: 2026-10-18 16:00:00.000000
+
+SQLite only, the other databases search without an index. The DDL lives in app.utils.search,
+shared with prepare_database(); the existing rows are indexed when the tables are created.
+"""
+from alembic import op
+
+from app.utils.search import SEARCH_INDEXES, create_search_indexes
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_search_indexes'
+down_revision = '0006_user_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_search_indexes(op.get_bind())
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table in SEARCH_INDEXES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{suffix}')
+        op.execute(f'DROP TABLE IF EXISTS {table}_fts')
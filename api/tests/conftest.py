@@ -0,0 +1,51 @@
+import pytest
+
+from app import create_app
+from app.db import db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An app on its own temporary SQLite database, created and seeded by create_app()."""
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("API_DOCS_ENABLED", "False")
+    # Every conditional GET reads the versions, so the statement counts do not depend on timing
+    monkeypatch.setenv("TABLE_VERSION_CACHE_TTL", "0")
+
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app
+
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def create_transactions(client):
+    """Creates ``count`` transactions through the API, all of the same user and product. Returns the user id."""
+    owner = {}
+
+    def create(count : int):
+        if not owner:
+            user = client.post("/user", json={"name": "Ana", "email": "ana@example.com", "document": "12345678900"})
+            product = client.post("/products", json={"name": "Caneca", "price": 12.5, "stock": 1000, "description": "Caneca de cerâmica"})
+            assert user.status_code == 201 and product.status_code == 201
+            owner.update(user_id=user.get_json()["id"], product_id=product.get_json()["id"])
+
+        for _ in range(count):
+            response = client.post("/transaction", json={
+                "user_id": owner["user_id"],
+                "product_id": owner["product_id"],
+                "quantity": 1,
+                "status_id": "pending",
+                "status": "pending",
+            })
+            assert response.status_code == 201, response.get_data(as_text=True)
+        return owner["user_id"]
+
+    return create
@@ -0,0 +1,92 @@
+import asyncio
+import importlib
+import os
+from unittest import mock
+
+import pytest
+from sqlalchemy import text
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture(scope="module")
+def asgi(tmp_path_factory):
+    """app.asgi on a temporary database; it creates the Flask app when imported, so only once."""
+    database = tmp_path_factory.mktemp("asgi") / "asgi.db"
+    # Importing main loads api/.env; the whole environment is restored once the module is done
+    environ = mock.patch.dict(os.environ, {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{database}", "API_DOCS_ENABLED": "False"})
+    environ.start()
+    module = importlib.import_module("app.asgi")
+
+    client = module.flask_app.test_client()
+    user = client.post("/user", json={"name": "Ana", "email": "ana@example.com", "document": "12345678900"}).get_json()
+    product = client.post("/products", json={"name": "Caneca", "price": 10.0, "stock": 100, "description": "Caneca"}).get_json()
+    for _ in range(3):
+        client.post("/transaction", json={
+            "user_id": user["id"], "product_id": product["id"], "quantity": 1, "status_id": "pending", "status": "pending",
+        })
+
+    asyncio.run(module.application.startup())
+    yield module
+    asyncio.run(module.application.shutdown())
+    environ.stop()
+
+
+def _get(asgi, path : str, accept : str = "application/json"):
+    """Runs one GET through the ASGI app and returns the messages it sent."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+        "headers": [(b"accept", accept.encode())],
+    }
+    asyncio.run(asgi.application(scope, receive, send))
+    return messages
+
+
+def test_status_created_by_another_worker_resolves_through_the_async_session(asgi, caplog):
+    from app.db import db
+    from app.repositories.status_repository import StatusRepository
+
+    with asgi.flask_app.app_context():
+        db.session.execute(text("INSERT INTO status (id, name) VALUES (98, 'disputed')"))
+        db.session.execute(text("UPDATE \"transaction\" SET status_id = 98 WHERE id = 2"))
+        db.session.commit()
+
+    StatusRepository.names.configure(0)
+    messages = _get(asgi, "/transactions/2")
+
+    assert messages[0]["status"] == 200
+    assert asgi.flask_app.json.loads(messages[1]["body"])["status"] == "disputed"
+    assert "application context" not in caplog.text
+
+
+def test_stream_failing_after_its_start_only_ends_the_body(asgi, monkeypatch):
+    async def failing_rows(*args, **kwargs):
+        yield {"id": 1}
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(asgi, "NDJSON_CHUNK_ROWS", 1)
+    monkeypatch.setattr(asgi.AsyncReadRepository, "iter_all", failing_rows)
+    messages = _get(asgi, "/transactions", accept="application/x-ndjson")
+
+    starts = [message for message in messages if message["type"] == "http.response.start"]
+    assert len(starts) == 1 and starts[0]["status"] == 200
+    assert messages[-1] == {"type": "http.response.body", "body": b""}
+
+
+def test_query_string_is_read_like_flask_request_args(asgi):
+    request = asgi.Request({"query_string": b"limit=1&limit=2&after=&fields=id", "headers": []}, {})
+    assert request.args == {"limit": "1", "after": "", "fields": "id"}
+
+    messages = _get(asgi, "/transactions?limit=1&limit=2")
+    assert len(asgi.flask_app.json.loads(messages[1]["body"])["items"]) == 1
+    # A blank limit is rejected as by the Flask route, instead of being dropped
+    assert _get(asgi, "/transactions?limit=")[0]["status"] == 400
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app.db import db
+from app.repositories.user_repository import UserRepository
+
+
+class Reloads(list):
+    def __init__(self):
+        super().__init__()
+        self.done = threading.Event()
+
+
+@pytest.fixture
+def reloads(app, monkeypatch):
+    """Records the background reloads of the user name index; ``reloads.done`` is set after each one."""
+    app.config["AUTOCOMPLETE_REFRESH_SECONDS"] = 1e-9
+    calls = Reloads()
+    load = UserRepository.load_name_index
+
+    def counting_load():
+        load()
+        calls.append(1)
+        calls.done.set()
+
+    monkeypatch.setattr(UserRepository, "load_name_index", staticmethod(counting_load))
+    return calls
+
+
+def _names(client, prefix : str):
+    return [row["name"] for row in client.get(f"/autocomplete?type=user&prefix={prefix}").get_json()]
+
+
+def test_local_writes_are_applied_without_reloading(client, reloads):
+    for index in range(3):
+        client.post("/user", json={"name": f"Bruna {index}", "email": f"b{index}@example.com", "document": f"doc{index}"})
+    client.put("/user", json={"id": 1, "name": "Beatriz", "email": "b0@example.com", "document": "doc0"})
+    client.delete("/user/2")
+
+    assert _names(client, "b") == ["Beatriz", "Bruna 2"]
+    # A reload would run in the background, give it the time to start
+    assert not reloads.done.wait(0.5)
+    assert reloads == []
+
+
+def test_writes_of_another_process_trigger_a_reload(app, client, reloads):
+    with app.app_context():
+        db.session.execute(text("INSERT INTO user (name, email, document) VALUES ('Carla', 'c@example.com', 'doc9')"))
+        db.session.execute(text("UPDATE table_version SET version = version + 1 WHERE name = 'user'"))
+        db.session.commit()
+
+    assert _names(client, "car") == []
+    assert reloads.done.wait(5)
+    assert _names(client, "car") == ["Carla"]
+    assert reloads == [1]
@@ -0,0 +1,14 @@
+def test_conditional_responses_vary_on_accept(client, create_transactions):
+    create_transactions(1)
+
+    response = client.get("/transactions")
+    assert response.status_code == 200
+    assert "Accept" in response.vary
+
+    revalidated = client.get("/transactions", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert "Accept" in revalidated.vary
+
+    streamed = client.get("/transactions", headers={"Accept": "application/x-ndjson"})
+    assert "Accept" in streamed.vary
+    assert streamed.headers["ETag"] != response.headers["ETag"]
@@ -0,0 +1,22 @@
+def _import(client, body : str):
+    response = client.post("/products/import", data=body.encode(), content_type="text/csv")
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()
+
+
+def test_invalid_rows_are_reported_and_the_valid_ones_still_written(client):
+    report = _import(client, "name,price,stock,description\n"
+                             "X,1,2,d\n"
+                             "Y,nan,2,d\n"
+                             "Z,inf,2,d\n"
+                             "W,-inf,2,d\n"
+                             "V,-1,2,d\n"
+                             "U,abc,2,d\n"
+                             "T,2.5,3,d\n")
+
+    assert (report["processed"], report["inserted"], report["failed"]) == (7, 2, 5)
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5, 6, 7]
+    assert report["errors"][0]["error"] == "Invalid field 'price', expected a finite number"
+
+    products = client.get("/products?all=1").get_json()
+    assert sorted((product["name"], product["price"]) for product in products) == [("T", 2.5), ("X", 1.0)]
@@ -0,0 +1,39 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app.db import db
+from app.middlewares.sql_timing import assert_max_queries, query_budget
+
+
+@pytest.fixture
+def over_budget_client(app):
+    @query_budget(1)
+    def two_statements():
+        db.session.execute(text("SELECT 1"))
+        db.session.execute(text("SELECT 2"))
+        return {"ok": True}
+
+    app.add_url_rule("/test/over-budget", "over_budget", two_statements)
+    return app.test_client()
+
+
+def test_over_budget_view_fails_when_testing(over_budget_client):
+    with pytest.raises(AssertionError, match="ran 2 SQL statements, budget is 1"):
+        over_budget_client.get("/test/over-budget")
+
+
+def test_over_budget_view_only_warns_when_not_strict(app, over_budget_client, caplog):
+    app.testing = False
+    with caplog.at_level(logging.WARNING):
+        response = over_budget_client.get("/test/over-budget")
+
+    assert response.status_code == 200
+    assert "budget is 1" in caplog.text
+
+
+def test_assert_max_queries_fails_over_budget(client):
+    with pytest.raises(AssertionError, match="budget is 0"):
+        with assert_max_queries(0):
+            client.get("/transactions")
@@ -0,0 +1,52 @@
+import pytest
+
+from app.middlewares.sql_timing import assert_max_queries, collect_queries
+
+# N+1 guard: listing transactions must not issue one statement per row (e.g. for its status)
+MANY = 25
+
+
+def _statements(client, url : str):
+    with collect_queries() as stats:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return stats.count
+
+
+@pytest.mark.parametrize("url", [
+    "/transactions",
+    "/transactions?all=1",
+    "/transactions/user/{user_id}",
+    "/transactions/1",
+])
+def test_transaction_reads_run_a_constant_number_of_statements(client, create_transactions, url):
+    user_id = create_transactions(1)
+    url = url.format(user_id=user_id)
+    with assert_max_queries(2):
+        single = _statements(client, url)
+
+    create_transactions(MANY - 1)
+    with assert_max_queries(single):
+        response = client.get(url)
+    assert response.status_code == 200
+
+
+def test_listing_returns_every_transaction_with_its_status(client, create_transactions):
+    create_transactions(MANY)
+
+    with assert_max_queries(2):
+        transactions = client.get("/transactions?all=1").get_json()
+
+    assert len(transactions) == MANY
+    assert {transaction["status"] for transaction in transactions} == {"pending"}
+
+
+def test_listing_is_paginated_unless_the_whole_list_is_asked_for(client, create_transactions):
+    create_transactions(3)
+
+    page = client.get("/transactions?limit=2").get_json()
+    assert [transaction["id"] for transaction in page["items"]] == [1, 2]
+    assert page["next_cursor"] == 2
+
+    page = client.get("/transactions").get_json()
+    assert len(page["items"]) == 3 and page["next_cursor"] is None
@@ -0,0 +1,41 @@
+from sqlalchemy import text
+
+from app.db import db
+from app.middlewares.sql_timing import assert_max_queries
+from app.repositories.status_repository import StatusRepository
+
+
+def test_unknown_status_id_is_rejected_from_the_cache(app, client, create_transactions):
+    app.config["QUERY_BUDGET_STRICT"] = True
+    user_id = create_transactions(1)
+
+    with assert_max_queries(0):
+        response = client.post("/transaction", json={"user_id": user_id, "product_id": 1, "quantity": 1, "status_id": 999})
+    assert response.status_code == 400
+    assert response.is_json
+
+
+def test_unknown_status_name_does_not_reload_the_cache(client, create_transactions):
+    create_transactions(1)
+
+    for _ in range(3):
+        with assert_max_queries(0):
+            response = client.put("/transaction/status", json={"transaction_id": 1, "status": "nope"})
+        assert response.status_code == 404
+
+
+def test_status_created_by_another_worker_is_picked_up_by_a_rate_limited_reload(app, client, create_transactions):
+    create_transactions(1)
+    with app.app_context():
+        # As another process would: straight to the database, this worker's cache is not told
+        db.session.execute(text("INSERT INTO status (id, name) VALUES (99, 'refunded')"))
+        db.session.execute(text("UPDATE \"transaction\" SET status_id = 99 WHERE id = 1"))
+        db.session.commit()
+
+    assert client.get("/transactions/1").get_json()["status"] is None
+
+    # The reload is one statement over the read budget, once per refresh interval
+    app.testing = False
+    StatusRepository.names.configure(0)
+    assert client.get("/transactions/1").get_json()["status"] == "refunded"
+    assert client.get("/transactions?fields=id,status").get_json()["items"] == [{"id": 1, "status": "refunded"}]
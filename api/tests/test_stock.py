@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def product(client):
+    def create(stock : int):
+        response = client.post("/products", json={"name": "Caneca", "price": 10.0, "stock": stock, "description": "Caneca"})
+        return response.get_json()["id"]
+    return create
+
+
+@pytest.fixture
+def user_id(client):
+    return client.post("/user", json={"name": "Ana", "email": "ana@example.com", "document": "12345678900"}).get_json()["id"]
+
+
+def _stock(client, product_id : int):
+    return client.get(f"/products/{product_id}").get_json()["stock"]
+
+
+def _buy(client, user_id : int, product_id : int, quantity : int, status : str = "pending"):
+    return client.post("/transaction", json={
+        "user_id": user_id, "product_id": product_id, "quantity": quantity, "status_id": status, "status": status,
+    })
+
+
+def _put(client, transaction : dict, **changes):
+    data = {"transaction_id": transaction["id"], "user_id": transaction["user_id"], "product_id": transaction["product_id"],
+            "quantity": transaction["quantity"], "total": transaction["total"], **changes}
+    return client.put("/transaction", json=data)
+
+
+def test_create_reserves_and_rejects_oversell(client, product, user_id):
+    product_id = product(5)
+    assert _buy(client, user_id, product_id, 3).status_code == 201
+    assert _buy(client, user_id, product_id, 3).status_code == 400
+    assert _stock(client, product_id) == 2
+
+
+def test_concurrent_reservations_never_oversell(app, client, product, user_id):
+    # The app fixture runs on a SQLite file, so every thread gets its own connection
+    product_id = product(10)
+    workers = 12
+    barrier = threading.Barrier(workers)
+    statuses = []
+
+    def reserve():
+        worker_client = app.test_client()
+        barrier.wait()
+        statuses.append(_buy(worker_client, user_id, product_id, 3).status_code)
+
+    threads = [threading.Thread(target=reserve) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reserved = statuses.count(201)
+    assert 1 <= reserved <= 3
+    assert _stock(client, product_id) == 10 - 3 * reserved >= 0
+    assert len(client.get("/transactions?all=1").get_json()) == reserved
+
+
+def test_update_recomputes_the_total_from_the_price(client, product, user_id):
+    product_id = product(10)
+    transaction = _buy(client, user_id, product_id, 2).get_json()
+
+    response = _put(client, transaction, quantity=3, total=0.01)
+    assert response.status_code == 200
+    assert response.get_json()["total"] == 30.0
+
+
+def test_delete_gives_the_stock_back(client, product, user_id):
+    product_id = product(10)
+    transaction = _buy(client, user_id, product_id, 4).get_json()
+
+    assert client.delete(f"/transactions/{transaction['id']}").status_code == 200
+    assert _stock(client, product_id) == 10
+
+
+def test_update_applies_the_quantity_delta(client, product, user_id):
+    product_id = product(10)
+    transaction = _buy(client, user_id, product_id, 4).get_json()
+
+    assert _put(client, transaction, quantity=7).status_code == 200
+    assert _stock(client, product_id) == 3
+    assert _put(client, transaction, quantity=2).status_code == 200
+    assert _stock(client, product_id) == 8
+
+
+def test_update_beyond_the_stock_is_rejected_unchanged(client, product, user_id):
+    product_id = product(10)
+    transaction = _buy(client, user_id, product_id, 4).get_json()
+
+    response = _put(client, transaction, quantity=15)
+    assert response.status_code == 409
+    assert _stock(client, product_id) == 6
+    assert client.get(f"/transactions/{transaction['id']}").get_json()["quantity"] == 4
+
+
+def test_update_to_another_product_moves_the_stock(client, product, user_id):
+    first, second = product(10), product(5)
+    transaction = _buy(client, user_id, first, 4).get_json()
+
+    assert _put(client, transaction, product_id=second, quantity=5).status_code == 200
+    assert (_stock(client, first), _stock(client, second)) == (10, 0)
+    assert _put(client, {**transaction, "product_id": second, "quantity": 5}, product_id=first, quantity=11).status_code == 409
+    assert (_stock(client, first), _stock(client, second)) == (10, 0)
+
+
+@pytest.mark.parametrize("status", ["canceled", "rejected"])
+def test_releasing_status_gives_the_stock_back_and_reverting_reserves_it(client, product, user_id, status):
+    product_id = product(10)
+    transaction = _buy(client, user_id, product_id, 4).get_json()
+
+    response = client.put("/transaction/status", json={"transaction_id": transaction["id"], "status": status})
+    assert response.status_code == 200
+    assert _stock(client, product_id) == 10
+
+    assert _buy(client, user_id, product_id, 8).status_code == 201
+    response = client.put("/transaction/status", json={"transaction_id": transaction["id"], "status": "approved"})
+    assert response.status_code == 409
+    assert client.get(f"/transactions/{transaction['id']}").get_json()["status"] == status
+
+    response = client.put("/transaction/status", json={"transaction_id": transaction["id"], "status": "concluded"})
+    assert response.status_code == 409
+    client.delete(f"/transactions/{transaction['id']}")
+    assert _stock(client, product_id) == 2
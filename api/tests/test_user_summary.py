@@ -0,0 +1,36 @@
+from app.db import unit_of_work
+from app.repositories.user_summary_repository import UserSummaryRepository
+
+
+def test_summary_counts_the_user_transactions(client, create_transactions):
+    user_id = create_transactions(3)
+
+    summary = client.get(f"/users/{user_id}/summary").get_json()
+    assert (summary["transaction_count"], summary["quantity"], summary["total_spent"]) == (3, 3, 37.5)
+    assert summary["status_counts"] == {"pending": 3}
+
+
+def test_deleted_user_has_no_summary(app, client, create_transactions):
+    user_id = create_transactions(2)
+
+    assert client.delete(f"/user/{user_id}").status_code == 200
+    assert client.get(f"/users/{user_id}/summary").status_code == 404
+
+    with app.app_context(), unit_of_work():
+        assert UserSummaryRepository.rebuild() == (0, 0)
+
+
+def test_changing_a_deleted_user_transaction_does_not_bring_the_summary_back(app, client, create_transactions):
+    user_id = create_transactions(3)
+    assert client.delete(f"/user/{user_id}").status_code == 200
+
+    response = client.put("/transaction/status", json={"transaction_id": 1, "status": "approved"})
+    assert response.status_code == 200
+    transaction = client.get("/transactions/2").get_json()
+    response = client.put("/transaction", json={**transaction, "transaction_id": 2, "quantity": 2})
+    assert response.status_code == 200
+    assert client.delete("/transactions/3").status_code == 200
+
+    assert client.get(f"/users/{user_id}/summary").status_code == 404
+    with app.app_context(), unit_of_work():
+        assert UserSummaryRepository.rebuild() == (0, 0)
@@ -0,0 +1,21 @@
+import axios from "axios";
+
+interface Page<T> {
+  items: T[];
+  next_cursor: number | null;
+  limit: number;
+}
+
+// As listagens da API são paginadas: segue o next_cursor até a última página
+export const fetchAll = async <T>(url: string): Promise<T[]> => {
+  const items: T[] = [];
+  let after: number | null = null;
+  do {
+    const params: Record<string, number> = { limit: 500 };
+    if (after !== null) params.after = after;
+    const response = await axios.get<Page<T>>(url, { params });
+    items.push(...response.data.items);
+    after = response.data.next_cursor;
+  } while (after !== null);
+  return items;
+};
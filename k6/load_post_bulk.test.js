@@ -0,0 +1,42 @@
+import http from 'k6/http';
+import { check } from 'k6';
+import { Counter } from 'k6/metrics';
+
+// Same payload as load_post.test.js, but sent through POST /users/bulk.
+// Compare users_created/s here with http_reqs/s from load_post.test.js.
+
+const BATCH_SIZE = parseInt(__ENV.BATCH_SIZE || '1000');
+
+const created = new Counter('users_created');
+
+export const options = {
+    vus: 10,
+    duration: '60s',
+    thresholds: {
+        http_req_failed: ['rate<0.01'],
+    },
+};
+
+export default function () {
+    const users = [];
+    for (let i = 0; i < BATCH_SIZE; i++) {
+        users.push({
+            email: `user_${Math.floor(Math.random() * 10000)}@email.com`,
+            name: `TesteName${Math.floor(Math.random() * 1000)} LastName${Math.floor(Math.random() * 1000)}`,
+            document: `${__VU}-${__ITER}-${i}-${Math.floor(Math.random() * 1000000000)}`,
+        });
+    }
+
+    const params = {
+        headers: {
+            'Content-Type': 'application/json',
+        },
+    };
+
+    const resp = http.post('http://localhost:8080/users/bulk', JSON.stringify(users), params);
+    check(resp, { 'status is 200': (r) => r.status === 200 });
+
+    if (resp.status === 200) {
+        created.add(resp.json().summary.created);
+    }
+}
@@ -0,0 +1,52 @@
+import http from 'k6/http';
+
+// Readers and writers at the same time, to compare DATABASE_PROFILE=debug and
+// DATABASE_PROFILE=production. Compare the p(95) of each scenario in the summary.
+
+const BASE_URL = __ENV.BASE_URL || 'http://localhost:8080';
+
+export const options = {
+    scenarios: {
+        writers: {
+            executor: 'ramping-vus',
+            exec: 'write',
+            stages: [
+                { duration: '10s', target: 100 },
+                { duration: '1m', target: 100 },
+                { duration: '10s', target: 400 },
+                { duration: '1m', target: 400 },
+                { duration: '10s', target: 0 },
+            ],
+        },
+        readers: {
+            executor: 'constant-vus',
+            exec: 'read',
+            vus: 200,
+            duration: '2m40s',
+        },
+    },
+    thresholds: {
+        'http_req_duration{scenario:readers}': ['p(95)<2000'],
+        'http_req_duration{scenario:writers}': ['p(95)<2000'],
+    },
+};
+
+const params = {
+    headers: {
+        'Content-Type': 'application/json',
+    },
+};
+
+export function write() {
+    const payload = JSON.stringify({
+        email: `user_${Math.floor(Math.random() * 10000)}@email.com`,
+        name: `TesteName${Math.floor(Math.random() * 1000)} LastName${Math.floor(Math.random() * 1000)}`,
+        document: `${Math.floor(10000000000 + Math.random() * 90000000000)}`,
+    });
+
+    http.post(`${BASE_URL}/user`, payload, params);
+}
+
+export function read() {
+    http.get(`${BASE_URL}/users?limit=50`);
+}
@@ -0,0 +1,30 @@
+import http from 'k6/http';
+import { check } from 'k6';
+
+// Same spike as spike_get.test.js, ramping in steps so the summary shows where each serving mode
+// starts failing. Run it against `python -m app.serve` and then `python -m app.asgi`.
+
+const BASE_URL = __ENV.BASE_URL || 'http://localhost:8080';
+
+export const options = {
+    stages: [
+        { duration: '10s', target: 500 },
+        { duration: '20s', target: 500 },
+        { duration: '10s', target: 2000 },
+        { duration: '20s', target: 2000 },
+        { duration: '10s', target: 5000 },
+        { duration: '20s', target: 5000 },
+        { duration: '10s', target: 0 },
+    ],
+    thresholds: {
+        http_req_failed: ['rate<0.01'],
+        http_req_duration: ['p(95)<5000'],
+    },
+};
+
+export default function () {
+    const resp = http.get(`${BASE_URL}/users?limit=50`, { timeout: '10s' });
+    check(resp, {
+        'status is 200': (r) => r.status === 200,
+    });
+}
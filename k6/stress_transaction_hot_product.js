@@ -0,0 +1,69 @@
+import http from 'k6/http';
+import { check } from 'k6';
+import { Counter } from 'k6/metrics';
+
+// Many VUs buying the same product at once. At the end the number of accepted
+// transactions must match exactly the stock consumed (no overselling).
+
+const BASE_URL = __ENV.BASE_URL || 'http://localhost:8080';
+const INITIAL_STOCK = parseInt(__ENV.INITIAL_STOCK || '1000');
+
+const accepted = new Counter('transactions_accepted');
+const rejected = new Counter('transactions_rejected');
+
+export const options = {
+    vus: 200,
+    duration: '30s',
+    thresholds: {
+        http_req_duration: ['p(95)<2000'],
+    },
+};
+
+const params = {
+    headers: {
+        'Content-Type': 'application/json',
+    },
+};
+
+export function setup() {
+    const user = http.post(`${BASE_URL}/user`, JSON.stringify({
+        name: 'Hot Product Buyer',
+        email: 'buyer@email.com',
+        document: `${Math.floor(10000000000 + Math.random() * 90000000000)}`,
+    }), params).json();
+
+    const product = http.post(`${BASE_URL}/products`, JSON.stringify({
+        name: `Hot Product ${Date.now()}`,
+        price: 10.0,
+        stock: INITIAL_STOCK,
+        description: 'Single hot product for the reservation benchmark',
+    }), params).json();
+
+    return { userId: user.id, productId: product.id };
+}
+
+export default function (data) {
+    const resp = http.post(`${BASE_URL}/transaction`, JSON.stringify({
+        user_id: data.userId,
+        product_id: data.productId,
+        quantity: 1,
+        status_id: 'pending',
+        status: 'pending',
+    }), params);
+
+    if (resp.status === 201) {
+        accepted.add(1);
+    } else {
+        rejected.add(1);
+    }
+}
+
+export function teardown(data) {
+    const product = http.get(`${BASE_URL}/products/${data.productId}`).json();
+    const sold = http.get(`${BASE_URL}/transactions/user/${data.userId}`).json();
+
+    check(product, {
+        'stock never goes negative': (p) => p.stock >= 0,
+        'stock consumed matches accepted transactions': (p) => INITIAL_STOCK - p.stock === sold.length,
+    });
+}